@@ -1,6 +1,467 @@
+import hashlib
+import math
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
 import numpy as np
 import data  # data.py에서 약물 DB 로드
-from typing import List, Dict, Tuple, Optional, Any
+import pk_models
+from typing import List, Dict, Tuple, Optional, Any, Callable, Hashable, Iterator
+
+# 선택 의존성: Numba가 설치되어 있으면 fused 중첩 커널을 JIT 컴파일
+try:
+    import numba
+    NUMBA_AVAILABLE = True
+except ImportError:
+    numba = None
+    NUMBA_AVAILABLE = False
+
+# simulate_schedule에서 선택 가능한 중첩 계산 방식
+SIMULATION_METHODS = ("loop", "closed_form", "fft", "fused")
+
+# simulate_schedule에서 선택 가능한 시간 격자
+GRID_MODES = ("uniform", "adaptive")
+
+# simulate_schedule 성분 분해 기준 (약물별 / 투여 경로별)
+COMPONENT_GROUPS = ("drug", "route", "analyte")
+
+# 개인별 PK 파라미터 피팅(fit_pk_parameters) 설정
+FIT_MIN_LABS = 3                  # 피팅에 필요한 최소 검사 기록 수
+FIT_PRIOR_SIGMA = {"ka": 0.4, "ke": 0.3, "scale": 0.35}  # DrugInfo 기반 사전분포의 로그 표준편차
+FIT_ERROR_ADDITIVE = 10.0         # 측정 오차 모델: 가산 오차 (pg/mL)
+FIT_ERROR_PROPORTIONAL = 0.15     # 측정 오차 모델: 비례 오차 (측정값 대비)
+FIT_MAX_ITER = 30
+
+# 실제 투약 기록(이벤트) 시뮬레이션: 단위 곡선 대비 이 값 미만인 과거 투약의 잔여 기여는 생략
+EVENT_TAIL_EPSILON = 1e-10
+
+# 보정계수 시뮬레이션: 고정 간격 격자 (하루당 점 수)와 기간 단위 (일)
+# 격자 간격이 기간과 무관하므로 기간을 올림해도 검사일별 농도는 같고, 최대 검사일이 같은 구간이면 기록 추가 시에도 결과 재사용
+CALIBRATION_RESOLUTION = 24
+CALIBRATION_HORIZON_STEP_DAYS = 28
+
+# 스트리밍 시뮬레이션 기본 청크 길이 (일)
+STREAM_CHUNK_DAYS = 30
+
+# 프로세스 풀 병렬 시뮬레이션 기본 샤드 크기 (워커 1회 작업당 환자/샘플 수)
+# 워커 수와 무관하게 고정하므로 같은 seed면 CPU 코어 수가 다른 환경에서도 Monte Carlo 결과가 같음
+PARALLEL_SHARD_SIZE = 256
+
+# Monte Carlo 개인차 시뮬레이션 기본 설정
+# 각 값은 로그정규분포(평균 1배)로 샘플링되는 배수의 변동계수(CV)
+MONTE_CARLO_VARIABILITY = {
+    "half_life": 0.30,        # 약물별 반감기
+    "t_peak": 0.25,           # 약물별 Tmax
+    "bioavailability": 0.25,  # 약물별 생체이용률 (최대 1.0으로 제한)
+    "vd": 0.20,               # 환자별 분포용적 (모든 약물 공통)
+}
+MONTE_CARLO_PERCENTILES = (5, 25, 50, 75, 95)
+
+# 처방 최적화(optimize_regimen) 탐색 범위
+OPTIMIZER_INJECTION_INTERVALS = (3.0, 3.5, 4.0, 5.0, 7.0, 10.0, 14.0)   # 주사 투약 간격 후보 (일)
+OPTIMIZER_DAILY_SPLITS = (1, 2, 3)                                       # 설하 투약의 1일 분할 횟수 후보
+OPTIMIZER_DOSE_STEPS = {"Injection": 0.5, "Oral": 0.5, "Sublingual": 0.25, "Transdermal": 0.25}  # 1회 용량 단위 (mg)
+
+# 항정 상태(Steady State) 해석해 설정
+STEADY_MAX_PERIOD_DAYS = 180      # 공통 주기(투약 간격의 최소공배수) 상한, 초과 시 시뮬레이션으로 대체
+STEADY_PERIOD_TOLERANCE = 1e-6    # 공통 주기가 각 투약 간격의 정수배인지 판단하는 상대 허용 오차
+STEADY_RESOLUTION = 96            # 공통 주기 내 보조 평가 격자 (하루당 점 수)
+
+# 적응형 격자 설정
+ADAPTIVE_BASE_STRIDE = 6          # 배경 격자 간격 = 균일 격자 간격 × 6
+ADAPTIVE_RISE_FRACTIONS = (0.5,)  # 투약 ~ 누적 피크 사이 흡수 구간 격자점 (누적 피크 시각 배수)
+ADAPTIVE_TAIL_POINTS = 2          # 피크 이후 다음 투약까지 최소 격자점 수
+ADAPTIVE_TAIL_STEP_KE = 0.35      # 피크 이후 최대 격자 간격 (1/ke 단위)
+
+# First-pass 보정 대상 경로
+ORAL_ROUTES = ["Oral", "Anti-Androgen"]
+
+# 혈중 에스트라디올(E2)로 합산되는 투여 경로 (그 외 경로는 약물별로 별도의 분석물)
+ESTROGEN_ROUTES = ("Injection", "Oral", "Transdermal", "Sublingual")
+
+# 목표 농도 도달 시각 계산 (time_to_threshold): 도달 방향 및 근 탐색 허용오차 (h)
+THRESHOLD_DIRECTIONS = ("below", "above")
+THRESHOLD_TIME_TOL_HOURS = 1e-6
+
+# 농도 곡선에 반영하는 병용 약물 상호작용 (data.INTERACTION_DB type) 및 영향받는 약물 (DrugInfo.metabolism)
+CYP3A4_INTERACTION_TYPES = ("CYP3A4_INHIBITOR", "CYP3A4_INDUCER")
+CYP3A4_SUBSTRATE = "CYP3A4_SUBSTRATE"
+
+# -----------------------------------------------------------------------------
+# 환자 보정 계수 (스칼라/NumPy 배열 공용 - 다중 환자 일괄 계산에서 재사용)
+# -----------------------------------------------------------------------------
+def _liver_metabolism_factor(ast, alt):
+    """간 수치(AST/ALT) 40 초과 시 10단위당 2% 농도 상승 가정 (최대 20% 보정)"""
+    limit = 40.0
+    excess = np.maximum(ast, alt) - limit
+    return np.where(excess > 0, np.minimum(1.0 + (excess / 10.0) * 0.02, 1.2), 1.0)
+
+def _body_fat_adjustment(body_fat):
+    """체지방률에 따른 Vd 보정 (기준 22%)"""
+    baseline_fat = 22.0
+    fat_offset = (body_fat - baseline_fat) * 0.008
+    return np.clip(1.0 + fat_offset, 0.8, 1.5)
+
+def _bmi_adjustment(bmi):
+    """BMI에 따른 Vd 보정 (기준 22)"""
+    baseline_bmi = 22.0
+    bmi_offset = (bmi - baseline_bmi) * 0.01
+    return np.clip(1.0 + bmi_offset, 0.9, 1.3)
+
+def _first_pass_adjustment(age, route_type):
+    """경구 경로의 나이별 First-pass 효율 보정 (기준 25세)"""
+    if route_type in ORAL_ROUTES:
+        age_offset = (age - 25) * 0.002
+        return np.clip(1.0 + age_offset, 0.85, 1.15)
+    return 1.0
+
+# -----------------------------------------------------------------------------
+# 단위 응답 캐시 (LRU) - 세션/환자 간 공유
+# -----------------------------------------------------------------------------
+class _LRUCache:
+    """최대 크기 제한과 적중/미스 카운터를 가진 스레드 안전 LRU 캐시"""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._store: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        with self._lock:
+            if key in self._store:
+                self._store.move_to_end(key)
+                self.hits += 1
+                return self._store[key]
+            self.misses += 1
+
+        value = compute()
+        with self._lock:
+            self._store[key] = value
+            self._store.move_to_end(key)
+            while len(self._store) > self.maxsize:
+                self._store.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._store.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._store), "maxsize": self.maxsize}
+
+# 단위 응답 곡선: 환자 보정과 무관 (약물 ka/ke, 투약 일정, 시간 격자로 결정)
+_UNIT_RESPONSE_CACHE = _LRUCache(maxsize=128)
+# Bateman 계수: 약물 × 용량 × 환자 보정으로 결정
+_COEFFICIENT_CACHE = _LRUCache(maxsize=1024)
+
+# 보정계수 산출용 경로별 농도 (검사 기록 추가/삭제 시 재시뮬레이션 방지)
+_CALIBRATION_CACHE = _LRUCache(maxsize=32)
+
+def get_cache_stats() -> Dict[str, Dict[str, int]]:
+    """단위 응답/계수/보정 캐시의 적중(hit)/미스(miss) 통계"""
+    return {
+        "unit_response": _UNIT_RESPONSE_CACHE.stats(),
+        "coefficient": _COEFFICIENT_CACHE.stats(),
+        "calibration": _CALIBRATION_CACHE.stats(),
+    }
+
+def clear_caches():
+    """단위 응답/계수/보정 캐시 초기화"""
+    _UNIT_RESPONSE_CACHE.clear()
+    _COEFFICIENT_CACHE.clear()
+    _CALIBRATION_CACHE.clear()
+
+def _normalize_pauses(pauses):
+    """투약 중단 구간 목록 정규화: ((중단일, 재개일 또는 None), ...) - 캐시 키로 쓸 수 있는 튜플"""
+    if not pauses:
+        return ()
+    normalized = []
+    for stop, resume in pauses:
+        stop = float(stop)
+        resume = None if resume is None else float(resume)
+        if resume is not None and resume < stop:
+            raise ValueError(f"Pause window must resume after it stops. Got stop={stop}, resume={resume}")
+        normalized.append((stop, resume))
+    return tuple(sorted(normalized, key=lambda window: window[0]))
+
+def _normalize_interactions(interactions):
+    """
+    병용 약물 구간 목록 정규화: [(시작일, 종료일 또는 None, 병용 약물명), ...] -> ((시작일, 종료일, potency), ...)
+    CYP3A4 억제/유도제(CYP3A4_INTERACTION_TYPES)만 남깁니다. (칼륨/신장 상호작용은 농도에 반영하지 않음)
+    """
+    if not interactions:
+        return ()
+    normalized = []
+    for start, end, interactor in interactions:
+        if interactor not in data.INTERACTION_DB:
+            raise ValueError(f"Unknown interactor: {interactor}. Expected one of {tuple(data.INTERACTION_DB)}")
+        start = float(start)
+        end = None if end is None else float(end)
+        if end is not None and end < start:
+            raise ValueError(f"Interaction window must end after it starts. Got start={start}, end={end}")
+        info = data.INTERACTION_DB[interactor]
+        if info['type'] in CYP3A4_INTERACTION_TYPES:
+            normalized.append((start, end, float(info['potency'])))
+    return tuple(sorted(normalized, key=lambda window: window[0]))
+
+def _lognormal_factors(rng, cv, size):
+    """평균이 1이고 변동계수가 cv인 로그정규분포 배수 샘플 (cv=0이면 모두 1)"""
+    if cv <= 0:
+        return np.ones(size)
+    sigma = np.sqrt(np.log1p(cv ** 2))
+    return rng.lognormal(mean=-sigma ** 2 / 2, sigma=sigma, size=size)
+
+# -----------------------------------------------------------------------------
+# 흡수/제거 상수(ka, ke) 벡터화 솔버 및 메모
+# -----------------------------------------------------------------------------
+def solve_ka_ke(half_life, t_peak) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    반감기/Tmax 배열로부터 ka, ke를 한 번에 계산 (벡터화 Newton-Raphson)
+    ke = ln(2) / t_1/2, ka는 F(ka) = Tmax * (ka - ke) - (ln(ka) - ln(ke)) = 0의 해 (F'(ka) = Tmax - 1/ka)
+    Tmax <= 0이면 즉시 흡수(ka = 100)로 보고, ka <= ke(Flip-flop)가 되면 ke + 0.01로 보정합니다.
+    :param half_life: 반감기 (h), 스칼라 또는 배열
+    :param t_peak: Tmax (h), 스칼라 또는 배열
+    :return: (ka, ke) 배열
+    """
+    half_life, t_peak = np.broadcast_arrays(np.asarray(half_life, dtype=float), np.asarray(t_peak, dtype=float))
+    ke = np.log(2) / half_life
+
+    # 1. 초기 추정값 (t_peak <= 0 인 원소는 반복에서 제외)
+    instant = t_peak <= 0
+    safe_t_peak = np.where(instant, 1.0, t_peak)
+    ka = 1.0 / (safe_t_peak / 2.5)
+    ka = np.where(ka <= ke, ke * 2.0, ka)
+
+    # 2. 원소별로 수렴한 항목은 갱신을 멈추는 뉴턴-랩슨 반복
+    active = ~instant
+    for _ in range(15):
+        if not np.any(active):
+            break
+        ka = np.where(active, np.maximum(ka, 1e-5), ka)
+
+        f_val = safe_t_peak * (ka - ke) - (np.log(ka) - np.log(ke))
+        f_prime = safe_t_peak - (1.0 / ka)
+
+        # 기울기가 0에 가까운 원소는 발산 위험 -> 해당 원소만 중단
+        active &= np.abs(f_prime) >= 1e-7
+        delta = np.where(active, f_val / np.where(active, f_prime, 1.0), 0.0)
+        ka = ka - delta
+        active &= np.abs(delta) >= 1e-5
+
+    # 최종 안전장치: Flip-flop kinetics 방지
+    ka = np.where(ka <= ke, ke + 0.01, ka)
+    ka = np.where(instant, 100.0, ka)
+    return ka, ke
+
+# (half_life, t_peak) -> (ka, ke) 메모: DRUG_DB 및 사용자 정의 약물 모두 최초 조회 시 1회만 계산
+_KA_KE_MEMO: Dict[Tuple[float, float], Tuple[float, float]] = {}
+
+def get_ka_ke(drug_info) -> Tuple[float, float]:
+    """DrugInfo의 (ka, ke) 조회 (처음 조회하는 반감기/Tmax 조합만 벡터화 솔버로 계산 후 메모)"""
+    key = (float(drug_info.half_life), float(drug_info.t_peak))
+    if key not in _KA_KE_MEMO:
+        ka, ke = solve_ka_ke(key[0], key[1])
+        _KA_KE_MEMO[key] = (float(ka), float(ke))
+    return _KA_KE_MEMO[key]
+
+# -----------------------------------------------------------------------------
+# fused 중첩 커널 - 모든 약물의 모든 투약을 하나의 출력 배열에 누적 (Numba 선택, NumPy 대체 경로)
+# -----------------------------------------------------------------------------
+def _accumulate_doses(t, dose_times, dose_weights, dose_groups, term_amp, term_rate, term_delay, term_count, tails, out):
+    """
+    투약마다 [투약 시각, 투약 시각 + tail] 구간의 격자점에만 임펄스 응답을 더하는 단일 루프 (out에 누적)
+    - 투약 j: 시각 dose_times[j], 배율 dose_weights[j], 지수항 그룹 dose_groups[j]
+    - 그룹 g: 지수항 term_amp/term_rate/term_delay[g, :term_count[g]], 잔여 기여 생략 시간 tails[g]
+    투약별 응답은 loop 방식과 같이 0 미만을 잘라냅니다. Numba가 있으면 이 함수를 그대로 JIT 컴파일합니다.
+    """
+    for j in range(dose_times.shape[0]):
+        g = dose_groups[j]
+        t0 = dose_times[j]
+        start = np.searchsorted(t, t0, side="left")
+        end = np.searchsorted(t, t0 + tails[g], side="right")
+        for i in range(start, end):
+            since = t[i] - t0
+            value = 0.0
+            for m in range(term_count[g]):
+                if since >= term_delay[g, m]:
+                    value += term_amp[g, m] * math.exp(-term_rate[g, m] * (since - term_delay[g, m]))
+            if value > 0.0:
+                out[i] += dose_weights[j] * value
+
+_accumulate_doses_compiled = numba.njit(cache=True, nogil=True)(_accumulate_doses) if NUMBA_AVAILABLE else None
+
+def _superpose_windowed(t, dose_times, dose_weights, terms, tail_epsilon):
+    """
+    정렬된 투약 시각(h)/배율 배열의 중첩 - NumPy 슬라이딩 윈도우 (fused 커널의 대체 경로)
+    격자점 t마다 [t - tail, t] 구간의 투약만 searchsorted로 찾아 더하므로
+    계산량은 O(격자점 × 윈도우 내 투약 수)이며 전체 투약 수와 무관합니다.
+    (tail: 임펄스 응답이 tail_epsilon 미만이 되는 시간, pk_models.kernel_tail_hours)
+    """
+    conc = np.zeros_like(t)
+    if len(dose_times) == 0:
+        return conc
+
+    tail = pk_models.kernel_tail_hours(terms, tail_epsilon)
+    lo = np.searchsorted(dose_times, t - tail, side="left")
+    width = np.searchsorted(dose_times, t, side="right") - lo
+
+    # 윈도우 내 j번째 투약을 모든 격자점에 대해 한 번에 더함
+    for j in range(int(width.max())):
+        active = np.nonzero(width > j)[0]
+        idx = lo[active] + j
+        conc[active] += dose_weights[idx] * pk_models.evaluate_kernel(terms, t[active] - dose_times[idx])
+    return conc
+
+def _group_tail_epsilon(dose_weights, tail_epsilon, tail_tolerance=None):
+    """
+    투약 그룹의 임펄스 응답 절단 기준 (단위 용량/분포용적당)
+    tail_tolerance(농도 단위, pg/mL)가 있으면 가장 큰 투약 배율로 나누어 투약 1회의 생략 기여가 tail_tolerance 미만이 되도록 합니다.
+    """
+    if tail_tolerance is None:
+        return tail_epsilon
+    if tail_tolerance <= 0:
+        raise ValueError(f"tail_tolerance must be positive, got {tail_tolerance}")
+    max_weight = float(np.max(np.abs(dose_weights))) if len(dose_weights) else 0.0
+    return tail_tolerance / max_weight if max_weight > 0 else tail_epsilon
+
+def superpose_dose_groups(t, groups, out=None, tail_epsilon=EVENT_TAIL_EPSILON, compiled=None, tail_tolerance=None):
+    """
+    여러 약물(투약 그룹)의 투약을 하나의 출력 배열에 누적하는 fused 중첩
+    :param t: 정렬된 시간 격자 (h), 비균일 격자 가능
+    :param groups: [(투약 시각(h) 배열, 투약별 배율 배열, 지수항 분해 [(진폭, 속도, 지연), ...]), ...]
+    :param out: 결과를 누적할 배열 (생략 시 새로 할당)
+    :param compiled: True면 Numba 커널, False면 NumPy 대체 경로, None이면 Numba 설치 여부로 결정
+    :param tail_tolerance: 투약 1회당 생략 허용 농도 (pg/mL), 지정 시 그룹별 절단 시간을 투약 배율로 정함
+        (생략 시 tail_epsilon 기준, 전체 오차 상한은 truncation_error_bound 참고)
+    """
+    t = np.asarray(t, dtype=float)
+    if out is None:
+        out = np.zeros_like(t)
+    if compiled is None:
+        compiled = NUMBA_AVAILABLE
+    if compiled and not NUMBA_AVAILABLE:
+        raise ValueError("The compiled kernel requires numba to be installed.")
+
+    groups = [(np.asarray(times, dtype=float), np.asarray(weights, dtype=float), terms) for times, weights, terms in groups]
+    groups = [group for group in groups if len(group[0]) > 0]
+    if not groups:
+        return out
+
+    if not compiled:
+        for dose_times, dose_weights, terms in groups:
+            order = np.argsort(dose_times, kind="stable")
+            epsilon = _group_tail_epsilon(dose_weights, tail_epsilon, tail_tolerance)
+            out += _superpose_windowed(t, dose_times[order], dose_weights[order], terms, epsilon)
+        return out
+
+    n_terms = max(len(terms) for _, _, terms in groups)
+    term_amp = np.zeros((len(groups), n_terms))
+    term_rate = np.zeros((len(groups), n_terms))
+    term_delay = np.zeros((len(groups), n_terms))
+    term_count = np.zeros(len(groups), dtype=np.int64)
+    tails = np.zeros(len(groups))
+    for g, (_, dose_weights, terms) in enumerate(groups):
+        term_count[g] = len(terms)
+        term_amp[g, :len(terms)], term_rate[g, :len(terms)], term_delay[g, :len(terms)] = zip(*terms)
+        tails[g] = pk_models.kernel_tail_hours(terms, _group_tail_epsilon(dose_weights, tail_epsilon, tail_tolerance))
+
+    _accumulate_doses_compiled(
+        t,
+        np.concatenate([times for times, _, _ in groups]),
+        np.concatenate([weights for _, weights, _ in groups]),
+        np.concatenate([np.full(len(times), g, dtype=np.int64) for g, (times, _, _) in enumerate(groups)]),
+        term_amp, term_rate, term_delay, term_count, tails, out,
+    )
+    return out
+
+def truncation_error_bound(t, groups, tail_epsilon=EVENT_TAIL_EPSILON, tail_tolerance=None):
+    """
+    superpose_dose_groups가 생략한 잔여 기여의 격자점별 상한 (같은 groups/절단 기준)
+    절단 시간(tail) 이후 임펄스 응답은 h(s) <= A * exp(-k_min * (s - delay_max)) (A = Σ|진폭|)이므로
+    격자점 t에서 생략된 투약(s_j < t - tail)의 기여 합은
+        A * exp(-k_min * (t - delay_max)) * Σ_j |w_j| * exp(k_min * s_j)
+    이고, 정렬된 투약의 누적 합을 logaddexp로 한 번에 구해 (overflow 없이) 모든 격자점에서 평가합니다.
+    :return: 격자점별 최대 절대오차 배열 (농도 단위) - 최댓값이 전체 오차 상한
+    """
+    t = np.asarray(t, dtype=float)
+    bound = np.zeros_like(t)
+    for dose_times, dose_weights, terms in groups:
+        dose_times = np.asarray(dose_times, dtype=float)
+        dose_weights = np.abs(np.asarray(dose_weights, dtype=float))
+        rates = [k for _, k, _ in terms if k > 0]
+        if len(dose_times) == 0 or not rates:
+            continue
+        order = np.argsort(dose_times, kind="stable")
+        dose_times, dose_weights = dose_times[order], dose_weights[order]
+
+        k_min = min(rates)
+        delay_max = max(d for _, _, d in terms)
+        amplitude = sum(abs(a) for a, _, _ in terms)
+        tail = pk_models.kernel_tail_hours(terms, _group_tail_epsilon(dose_weights, tail_epsilon, tail_tolerance))
+
+        with np.errstate(divide="ignore"):
+            log_prefix = np.logaddexp.accumulate(np.log(dose_weights) + k_min * dose_times)
+        n_truncated = np.searchsorted(dose_times, t - tail, side="left")
+        truncated = n_truncated > 0
+        bound[truncated] += amplitude * np.exp(
+            log_prefix[n_truncated[truncated] - 1] - k_min * (t[truncated] - delay_max)
+        )
+    return bound
+
+def _exp_sum(amps, rates, const, tau):
+    """f(τ) = const + Σ amps_i * exp(-rates_i * τ)"""
+    return const + float(np.dot(amps, np.exp(-rates * tau)))
+
+def _exp_sum_roots(amps, rates, const, lo, hi, tol=THRESHOLD_TIME_TOL_HOURS):
+    """
+    지수함수 합 f(τ) = const + Σ amps_i * exp(-rates_i * τ) 의 [lo, hi] 내 근 (오름차순, rates > 0 이며 서로 다름)
+    f'(τ) * exp(r_min * τ)는 지수항이 하나 적은 같은 꼴이므로 극값을 재귀적으로 구해 단조 구간으로 나누고,
+    부호가 바뀌는 구간만 이분법으로 좁힙니다. (지수항 n개이면 근은 최대 n개)
+    """
+    if len(amps) == 0:
+        return []
+    # 양/음 진폭 항을 구간 양 끝에서 평가한 상/하한으로 근이 없는 구간은 바로 제외
+    decay_lo, decay_hi = np.exp(-rates * lo), np.exp(-rates * hi)
+    positive = amps > 0
+    lower = const + np.dot(amps[positive], decay_hi[positive]) + np.dot(amps[~positive], decay_lo[~positive])
+    upper = const + np.dot(amps[positive], decay_lo[positive]) + np.dot(amps[~positive], decay_hi[~positive])
+    if lower > 0 or upper < 0:
+        return []
+    i_min = int(np.argmin(rates))
+    rest = np.arange(len(rates)) != i_min
+    critical = _exp_sum_roots(
+        -rates[rest] * amps[rest], rates[rest] - rates[i_min], -rates[i_min] * amps[i_min], lo, hi, tol
+    )
+
+    roots = []
+    points = [lo] + critical + [hi]
+    for a, b in zip(points[:-1], points[1:]):
+        fa, fb = _exp_sum(amps, rates, const, a), _exp_sum(amps, rates, const, b)
+        if fa == 0:
+            if not roots or roots[-1] != a:
+                roots.append(a)
+            continue
+        if fb != 0 and (fa > 0) == (fb > 0):
+            continue
+        while b - a > tol:
+            mid = 0.5 * (a + b)
+            f_mid = _exp_sum(amps, rates, const, mid)
+            if f_mid == 0:
+                a = b = mid
+            elif (f_mid > 0) == (fa > 0):
+                a, fa = mid, f_mid
+            else:
+                b = mid
+        roots.append(b)
+    return roots
 
 class HormoneAnalyzer:
     def __init__(self, user_weight=60.0, user_age=25, ast=20.0, alt=20.0, body_fat=22.0, user_height=170.0):
@@ -15,110 +476,33 @@ class HormoneAnalyzer:
         # 투여 경로별 Vd 상수 (data.py에서 로드)
         self.ROUTE_CONSTANTS = data.ROUTE_CONSTANTS
 
-    def _solve_ka_newton(self, t_peak, ke):
-        """
-        Newton-Raphson Method를 사용한 ka 정밀 역산
-        목표식: Tmax = (ln(ka) - ln(ke)) / (ka - ke)
-        변형식 F(ka): Tmax * (ka - ke) - (ln(ka) - ln(ke)) = 0
-        도함수 F'(ka): Tmax - (1 / ka)
-        """
-        if t_peak <= 0:
-            return 100.0 # Instant absorption (IV Bolus-like)
-
-        # 1. 초기 추정값 (Initial Guess)
-        # 기존 Heuristic을 사용하여 근사한 값에서 시작 (수렴 속도 향상)
-        ka = 1.0 / (t_peak / 2.5)
-        
-        # ka가 ke보다 작거나 같으면 수식이 깨지므로 강제 보정
-        if ka <= ke: 
-            ka = ke * 2.0
-
-        # 2. 뉴턴-랩슨 반복 (일반적으로 5~10회 내외로 수렴)
-        for _ in range(15):
-            # ka가 0 이하로 떨어지는 것 방지
-            if ka <= 1e-5: 
-                ka = 1e-5
-            
-            # F(ka) 계산
-            f_val = t_peak * (ka - ke) - (np.log(ka) - np.log(ke))
-            
-            # F'(ka) 계산
-            f_prime = t_peak - (1.0 / ka)
-            
-            # 기울기가 0에 가까우면 발산 위험 -> 루프 중단
-            if abs(f_prime) < 1e-7:
-                break
-                
-            # Delta 계산
-            delta = f_val / f_prime
-            ka = ka - delta
-            
-            # 수렴 판정 (오차가 매우 작으면 종료)
-            if abs(delta) < 1e-5:
-                break
-        
-        # 최종 안전장치: Flip-flop kinetics 방지
-        # ka가 ke보다 작아지면 그래프 개형이 이상해지므로 보정
-        if ka <= ke:
-            ka = ke + 0.01
-
-        return ka
-
     def _get_ka_ke(self, drug_info):
         """
         약물 정보(반감기, Tmax)를 이용해 흡수상수(ka)와 제거상수(ke)를 계산
+        ke = ln(2) / t_1/2, ka는 Newton Method로 역산한 값을 모듈 메모(get_ka_ke)에서 조회합니다.
         """
-        half_life_hours = drug_info.half_life
-        t_peak_hours = drug_info.t_peak
-
-        # 1. 제거 상수 (ke) = ln(2) / t_1/2
-        ke = np.log(2) / half_life_hours
-
-        # 2. 흡수 상수 (ka) - 수치해석 적용
-        ka = self._solve_ka_newton(t_peak_hours, ke)
-
-        return ka, ke
+        return get_ka_ke(drug_info)
 
     def _get_liver_metabolism_factor(self):
         """
         간 수치(AST/ALT)에 따른 대사 효율 보정.
         """
-        limit = 40.0
-        if self.ast > limit or self.alt > limit:
-            excess = max(self.ast, self.alt) - limit
-            # 10단위 초과당 2% 농도 상승 가정 (최대 20% 보정)
-            factor = 1.0 + (excess / 10.0) * 0.02
-            return min(factor, 1.2)
-        return 1.0
+        return float(_liver_metabolism_factor(self.ast, self.alt))
 
     def _get_body_fat_adjustment(self):
         """체지방률에 따른 Vd 보정 (지용성 약물)"""
-        baseline_fat = 22.0
-        fat_offset = (self.body_fat - baseline_fat) * 0.008
-        adjustment = 1.0 + fat_offset
-        return np.clip(adjustment, 0.8, 1.5)
+        return _body_fat_adjustment(self.body_fat)
 
     def _get_bmi_adjustment(self):
         """BMI에 따른 Vd 보정"""
-        baseline_bmi = 22.0
-        bmi_offset = (self.bmi - baseline_bmi) * 0.01
-        adjustment = 1.0 + bmi_offset
-        return np.clip(adjustment, 0.9, 1.3)
+        return _bmi_adjustment(self.bmi)
 
     def _get_first_pass_adjustment(self, route_type):
         """나이에 따른 간 대사(First-pass) 효율 변화 보정"""
-        oral_routes = ["Oral", "Anti-Androgen"]
-        
-        if route_type in oral_routes:
-            age_offset = (self.age - 25) * 0.002
-            adjustment = 1.0 + age_offset
-            return np.clip(adjustment, 0.85, 1.15)
-        return 1.0
+        return _first_pass_adjustment(self.age, route_type)
 
-    def bateman_function(self, t, dose, ka, ke, f, ester_factor, route_type):
-        """
-        Bateman Function: C(t) 계산
-        """
+    def _get_effective_dose_and_volume(self, dose, f, ester_factor, route_type):
+        """환자 보정이 반영된 (흡수되는 유효 용량(ng), 분포용적) - Vd, 체지방, BMI, First-pass, 간 기능"""
         vd_const = self.ROUTE_CONSTANTS.get(route_type, 4.0)
         
         fat_mod = self._get_body_fat_adjustment()
@@ -131,17 +515,479 @@ class HormoneAnalyzer:
         
         adjusted_f = f * first_pass_mod * liver_func_mod
         effective_dose_ng = dose * adjusted_f * ester_factor * 1_000_000
+        return effective_dose_ng, current_total_volume
+
+    def _get_bateman_coefficient(self, dose, ka, ke, f, ester_factor, route_type):
+        """
+        Bateman 계수 계산: C(t) = coefficient * (exp(-ke*t) - exp(-ka*t))
+        환자 보정(Vd, 체지방, BMI, First-pass, 간 기능)이 모두 반영된 값을 반환합니다.
+        """
+        effective_dose_ng, current_total_volume = self._get_effective_dose_and_volume(dose, f, ester_factor, route_type)
         
         if ka == ke:
             ka = ke + 1e-5
 
         coefficient = (effective_dose_ng * ka) / (current_total_volume * (ka - ke))
+        return coefficient, ka
+
+    def bateman_function(self, t, dose, ka, ke, f, ester_factor, route_type):
+        """
+        Bateman Function: C(t) 계산
+        """
+        coefficient, ka = self._get_bateman_coefficient(dose, ka, ke, f, ester_factor, route_type)
         
         conc = coefficient * (np.exp(-ke * t) - np.exp(-ka * t))
         conc = np.maximum(conc, 0)
         
         return conc
 
+    @staticmethod
+    def _get_pause_mask(dose_times, stop_day=None, resume_day=None, pauses=None):
+        """
+        투약 유지 여부 불리언 마스크: 중단 구간 (중단일, 재개일) 사이의 투약을 제외
+        재개일이 None인 구간은 중단일 이후 모든 투약을 제외합니다. (중단일/재개일 당일 투약은 유지)
+        """
+        keep = np.ones(len(dose_times), dtype=bool)
+        windows = list(_normalize_pauses(pauses))
+        if stop_day is not None:
+            windows.append((stop_day, resume_day))
+        for stop, resume in windows:
+            if resume is None:
+                keep &= dose_times <= stop * 24
+            else:
+                keep &= (dose_times <= stop * 24) | (dose_times >= resume * 24)
+        return keep
+
+    @staticmethod
+    def _get_interaction_modifier(dose_times, drug_info, interactions=()):
+        """
+        투약별 생체이용률 배율: 투약 시각이 병용 구간 [시작일, 종료일) 안이면 해당 병용 약물의 potency를 곱함
+        (CYP3A4 기질 약물만 해당, 겹치는 구간은 potency의 곱, interactions는 _normalize_interactions 결과)
+        """
+        modifier = np.ones(len(dose_times))
+        if drug_info.metabolism != CYP3A4_SUBSTRATE:
+            return modifier
+        for start, end, potency in interactions:
+            active = dose_times >= start * 24
+            if end is not None:
+                active &= dose_times < end * 24
+            modifier[active] *= potency
+        return modifier
+
+    def _get_dose_times(self, item, total_hours, stop_day=None, resume_day=None, pauses=None):
+        """
+        투약 스케줄을 실제 투약 시각(h) 배열로 변환 (주기 투약, 중단/재개 반영)
+        주기 투약은 (주기 시작 시각 × 주기 내 투약일) 브로드캐스팅으로, 중단 구간은 불리언 마스크로 처리합니다.
+        :param pauses: 추가 투약 중단 구간 [(중단일, 재개일 또는 None), ...]
+        """
+        cycle_starts = np.arange(0, total_hours, float(item['interval']) * 24)
+
+        if item.get('is_cycling', False):
+            day_offsets = item.get('offset', 0.0) * 24 + 24.0 * np.arange(int(item.get('duration', 1.0)))
+            dose_times = (cycle_starts[:, None] + day_offsets[None, :]).ravel()
+            dose_times = dose_times[dose_times < total_hours]
+        else:
+            dose_times = cycle_starts
+
+        return dose_times[self._get_pause_mask(dose_times, stop_day, resume_day, pauses)]
+
+    def _get_dose_runs(self, item, total_hours, stop_day=None, resume_day=None, pauses=None):
+        """
+        투약 스케줄을 '등간격 투약 구간(run)' 목록으로 변환
+        반환값: [(첫 투약 시각(h), 투약 간격(h), 투약 횟수), ...]
+
+        - 일반 스케줄: 간격 τ의 단일 등차수열
+        - 주기(Cycling) 스케줄: 주기 내 d일차 투약을 각각 간격 τ의 등차수열로 분리
+        - stop_day/resume_day 및 pauses로 끊긴 구간은 별도의 run으로 분할
+        """
+        interval_hours = float(item['interval']) * 24
+        cycle_starts = np.arange(0, total_hours, interval_hours)
+
+        if item.get('is_cycling', False):
+            offset_hours = item.get('offset', 0.0) * 24
+            phases = [offset_hours + d * 24 for d in range(int(item.get('duration', 1.0)))]
+        else:
+            phases = [0.0]
+
+        runs = []
+        for phase in phases:
+            dose_times = cycle_starts + phase
+            keep = (dose_times < total_hours) & self._get_pause_mask(dose_times, stop_day, resume_day, pauses)
+
+            # 연속으로 유지되는 인덱스 구간(run) 추출
+            edges = np.diff(np.concatenate(([0], keep.astype(np.int8), [0])))
+            for first, end in zip(np.where(edges == 1)[0], np.where(edges == -1)[0]):
+                runs.append((dose_times[first], interval_hours, int(end - first)))
+
+        return runs
+
+    def _superpose_closed_form(self, t, runs, ka, ke):
+        """
+        등비급수 폐형식(Closed-form)을 이용한 반복 투약 중첩 계산 (단위 용량 계수 기준)
+
+        간격 τ로 n회 투약된 구간에서, 마지막 투약 후 경과시간을 s라 하면
+            Σ exp(-k(t - t_i)) = exp(-k*s) * (1 - exp(-k*n*τ)) / (1 - exp(-k*τ))
+        이므로 투약 횟수와 무관하게 격자점당 O(1)로 계산됩니다.
+        """
+        return self._superpose_terms_closed_form(t, runs, [(1.0, ke, 0.0), (-1.0, ka, 0.0)])
+
+    def _superpose_terms_closed_form(self, t, runs, terms):
+        """
+        임의의 지수항 분해 [(진폭, 속도, 지연), ...] 임펄스 응답의 폐형식 중첩 (pk_models 참고)
+        지연 d인 항은 각 run의 첫 투약 시각을 d만큼 옮겨 계산하고,
+        속도 0인 항(계단 함수)의 등비급수는 투약 횟수 n이 됩니다.
+        """
+        conc = np.zeros_like(t)
+
+        for t_first, period, count in runs:
+            for amplitude, k, delay in terms:
+                elapsed = t - (t_first + delay)
+                active = elapsed >= 0
+                if not np.any(active):
+                    continue
+
+                elapsed = elapsed[active]
+                # 현재 시점까지 투약된 횟수 (구간 내 투약 횟수로 제한)
+                last_idx = np.minimum(np.floor(elapsed / period), count - 1)
+                n_doses = last_idx + 1
+                if k > 0:
+                    since_last = elapsed - last_idx * period
+                    conc[active] += amplitude * (
+                        np.exp(-k * since_last) * (-np.expm1(-k * period * n_doses)) / (-np.expm1(-k * period))
+                    )
+                else:
+                    conc[active] += amplitude * n_doses
+
+        return np.maximum(conc, 0)
+
+    def _superpose_fft(self, t, dose_times, ka, ke):
+        """
+        FFT 합성곱(Convolution)을 이용한 임의 투약열 중첩 계산 (단위 용량 계수 기준)
+
+        투약 시각을 등간격 격자 위의 임펄스 열로 배치하고, 단위 임펄스 응답
+        exp(-ke*t) - exp(-ka*t)과 FFT로 합성곱하여 O(N log N)에 계산합니다.
+        임펄스 응답을 두 지수항으로 분리하여, 격자 사이에 놓인 투약은
+        다음 격자점에 exp(-k * 남은 시간) 가중치로 배치합니다.
+        지수함수의 이동 성질로 이 배치는 근사가 아닌 정확한 값이므로
+        loop 방식과 부동소수점 오차 수준(최대 농도 대비 상대오차 1e-9 이내)으로 일치합니다.
+        """
+        return self._superpose_terms_fft(t, dose_times, [(1.0, ke, 0.0), (-1.0, ka, 0.0)])
+
+    def _superpose_terms_fft(self, t, dose_times, terms):
+        """임의의 지수항 분해 [(진폭, 속도, 지연), ...] 임펄스 응답의 FFT 중첩 (지연 d인 항은 투약 시각 + d에 배치)"""
+        num_points = len(t)
+        conc = np.zeros(num_points)
+        if num_points < 2 or len(dose_times) == 0:
+            return conc
+
+        dt = t[1] - t[0]
+        # 선형 합성곱이 순환되지 않도록 2N 길이로 zero-padding
+        n_fft = 2 * num_points
+        lags = np.arange(num_points) * dt
+
+        spectrum = np.zeros(n_fft // 2 + 1, dtype=complex)
+        for amplitude, k, delay in terms:
+            pos = (np.asarray(dose_times, dtype=float) + delay) / dt
+            base_idx = np.floor(pos)
+            frac = pos - base_idx
+            target_idx = base_idx.astype(np.int64) + 1
+
+            in_range = target_idx < num_points
+            if not np.any(in_range):
+                continue
+            target_idx = target_idx[in_range]
+            frac = frac[in_range]
+
+            impulses = np.bincount(target_idx, weights=np.exp(-k * (1.0 - frac) * dt), minlength=num_points)
+            kernel = np.exp(-k * lags)
+            spectrum += amplitude * np.fft.rfft(impulses, n_fft) * np.fft.rfft(kernel, n_fft)
+
+        conc = np.fft.irfft(spectrum, n_fft)[:num_points]
+        return np.maximum(conc, 0)
+
+    def _get_profile_key(self):
+        """환자 보정 계수를 결정하는 프로필 값 (캐시 키)"""
+        return (self.weight, self.height, self.age, self.ast, self.alt, self.body_fat)
+
+    def _get_cached_coefficient(self, dose, ka, ke, f, ester_factor, route_type):
+        """_get_bateman_coefficient의 LRU 캐시 버전"""
+        key = (route_type, float(dose), ka, ke, f, ester_factor, self.ROUTE_CONSTANTS.get(route_type, 4.0), self._get_profile_key())
+        return _COEFFICIENT_CACHE.get_or_compute(
+            key, lambda: self._get_bateman_coefficient(dose, ka, ke, f, ester_factor, route_type)
+        )
+
+    def _get_grid_key(self, t_hours, total_hours, grid="uniform"):
+        """시간 격자 식별 키 (균일 격자는 범위/점 수, 적응형 격자는 격자 자체의 해시)"""
+        if grid == "uniform":
+            return ("uniform", float(total_hours), len(t_hours))
+        return (grid, hashlib.blake2b(t_hours.tobytes(), digest_size=16).digest())
+
+    def _get_unit_response(self, item, ka, ke, t_hours, total_hours, stop_day=None, resume_day=None, method="loop", grid_key=None, terms=None, pauses=None):
+        """
+        단일 스케줄 항목의 단위 계수(coefficient=1) 응답 곡선 (LRU 캐시)
+        곡선은 환자 보정과 무관하므로 같은 약물·투약 일정·격자를 쓰는 모든 세션이 공유합니다.
+        반환 배열은 읽기 전용입니다.
+        :param terms: 1구획 외 PK 모델의 지수항 분해 (_get_model_terms), 지정 시 ka/ke 대신 사용
+        """
+        if grid_key is None:
+            grid_key = self._get_grid_key(t_hours, total_hours)
+        key = (
+            method, ka, ke, None if terms is None else tuple(terms),
+            float(item['interval']), bool(item.get('is_cycling', False)),
+            float(item.get('offset', 0.0)), float(item.get('duration', 1.0)),
+            float(total_hours), grid_key, stop_day, resume_day, _normalize_pauses(pauses),
+        )
+
+        def _compute():
+            if terms is not None:
+                curve = self._superpose_model_terms(item, terms, t_hours, total_hours, stop_day, resume_day, method, pauses)
+            elif method == "closed_form":
+                runs = self._get_dose_runs(item, total_hours, stop_day, resume_day, pauses)
+                curve = self._superpose_closed_form(t_hours, runs, ka, ke)
+            elif method == "fft":
+                dose_times = self._get_dose_times(item, total_hours, stop_day, resume_day, pauses)
+                curve = self._superpose_fft(t_hours, dose_times, ka, ke)
+            elif method == "fused":
+                dose_times = self._get_dose_times(item, total_hours, stop_day, resume_day, pauses)
+                curve = superpose_dose_groups(t_hours, [(dose_times, np.ones(len(dose_times)), [(1.0, ke, 0.0), (-1.0, ka, 0.0)])])
+            else:
+                curve = np.zeros_like(t_hours)
+                for dose_t in self._get_dose_times(item, total_hours, stop_day, resume_day, pauses):
+                    shifted_t = t_hours - dose_t
+                    valid_mask = shifted_t >= 0
+                    if np.any(valid_mask):
+                        s_valid = shifted_t[valid_mask]
+                        curve[valid_mask] += np.maximum(np.exp(-ke * s_valid) - np.exp(-ka * s_valid), 0)
+            curve.flags.writeable = False
+            return curve
+
+        return _UNIT_RESPONSE_CACHE.get_or_compute(key, _compute)
+
+    def _superpose_model_terms(self, item, terms, t_hours, total_hours, stop_day=None, resume_day=None, method="loop", pauses=None):
+        """지수항 분해 임펄스 응답의 단일 스케줄 항목 중첩 (method별 계산은 Bateman 경로와 동일)"""
+        if method == "closed_form":
+            runs = self._get_dose_runs(item, total_hours, stop_day, resume_day, pauses)
+            return self._superpose_terms_closed_form(t_hours, runs, terms)
+        dose_times = self._get_dose_times(item, total_hours, stop_day, resume_day, pauses)
+        if method == "fft":
+            return self._superpose_terms_fft(t_hours, dose_times, terms)
+        if method == "fused":
+            return superpose_dose_groups(t_hours, [(dose_times, np.ones(len(dose_times)), terms)])
+        curve = np.zeros_like(t_hours)
+        for dose_t in dose_times:
+            curve += pk_models.evaluate_kernel(terms, t_hours - dose_t)
+        return curve
+
+    @staticmethod
+    def _get_superposed_peak_offsets(dose_times, ka, ke):
+        """
+        투약마다 이전 투약이 누적된 농도의 피크까지 걸리는 시간(h), 다음 투약 전에 피크가 없으면 NaN
+        투약 j 이후 농도는 A·(E_j·exp(-ke·s) - F_j·exp(-ka·s)) (E_j, F_j: 잔존 투약의 지수 감쇠 합)이므로
+        dC/ds = 0의 해 s* = ln(ka·F_j / (ke·E_j)) / (ka - ke)로 구합니다 (단회 투여 Tmax는 E_j = F_j = 1인 경우).
+        """
+        offsets = np.full(len(dose_times), np.nan)
+        if ka <= ke:
+            return offsets
+        e_sum = f_sum = 0.0
+        prev = None
+        for j, dose_t in enumerate(dose_times):
+            if prev is not None:
+                e_sum *= math.exp(-ke * (dose_t - prev))
+                f_sum *= math.exp(-ka * (dose_t - prev))
+            e_sum += 1.0
+            f_sum += 1.0
+            prev = dose_t
+            if ka * f_sum > ke * e_sum:
+                offsets[j] = math.log(ka * f_sum / (ke * e_sum)) / (ka - ke)
+        return offsets
+
+    def _build_adaptive_grid(self, schedule_list, total_hours, resolution, stop_day=None, resume_day=None, pauses=None, pk_params=None):
+        """
+        흡수 피크 주변에 격자점을 집중시킨 비균일 시간 격자(h) 생성 (격자점 수는 균일 격자보다 적게 유지)
+
+        - 필수 격자점: 각 투약 시각(투약 직전 농도, Trough)과 이전 투약이 누적된 피크 시각 (_get_superposed_peak_offsets)
+        - 보조 격자점: 균일 격자보다 ADAPTIVE_BASE_STRIDE배 성긴 배경 격자, 피크 이전 흡수 구간,
+          피크 이후 다음 투약까지 소실 속도(ke)에 맞춘 성긴 배치
+        - 투약이 잦아 보조 격자점이 몰리면 균일 격자 간격의 배수 단위 구간마다 1개만 남겨 전체 격자점 수를 균일 격자 미만으로 줄임
+        피크 시각은 약물별 ka/ke(pk_params 피팅값 우선)의 Bateman 곡선 기준이며, 필수 격자점만으로 균일 격자 이상이면 None을 반환합니다.
+        """
+        num_points = int(total_hours / 24 * resolution)
+        base_points = max(int(num_points / ADAPTIVE_BASE_STRIDE), 2)
+        required = [np.array([0.0, float(total_hours)])]
+        optional = [np.linspace(0, total_hours, base_points)]
+
+        for item in schedule_list:
+            if float(item['interval']) < 0.01 or item['name'] not in data.DRUG_DB:
+                continue
+            ka, ke, _ = self._get_item_pk(item['name'], data.DRUG_DB[item['name']], pk_params)
+            dose_times = np.sort(self._get_dose_times(item, total_hours, stop_day, resume_day, pauses))
+            if len(dose_times) == 0:
+                continue
+
+            # 다음 투약(같은 항목)까지의 간격, 마지막 투약은 시뮬레이션 종료 시각까지
+            gaps = np.diff(np.append(dose_times, total_hours))
+            peaks = self._get_superposed_peak_offsets(dose_times, ka, ke)
+            has_peak = np.isfinite(peaks) & (peaks < gaps)
+            required.append(dose_times)
+            required.append(dose_times[has_peak] + peaks[has_peak])
+
+            # 흡수 구간: 누적 피크 시각의 일정 비율 위치
+            rise = peaks[has_peak, None] * np.array(ADAPTIVE_RISE_FRACTIONS)[None, :]
+            optional.append((dose_times[has_peak, None] + rise).ravel())
+
+            # 피크(없으면 투약 시각) 이후 다음 투약까지: 소실 속도에 맞춘 기하 간격
+            tail_start = np.where(has_peak, peaks, 0.0)
+            n_tail = np.maximum(ADAPTIVE_TAIL_POINTS, np.ceil((gaps - tail_start) * ke / ADAPTIVE_TAIL_STEP_KE)).astype(int)
+            for n in np.unique(n_tail):
+                sel = n_tail == n
+                fractions = np.linspace(0, 1, n + 2)[1:-1]
+                start = np.maximum(tail_start[sel], 1e-9)
+                offsets = start[:, None] * (gaps[sel] / start)[:, None] ** fractions[None, :]
+                offsets = np.where(tail_start[sel, None] > 0, offsets, gaps[sel, None] * fractions[None, :])
+                optional.append((dose_times[sel, None] + offsets).ravel())
+
+        required_hours = np.unique(np.concatenate(required))
+        required_hours = required_hours[required_hours <= total_hours]
+        budget = num_points - len(required_hours) - 1
+        if budget < 0:
+            return None
+        optional_hours = np.setdiff1d(np.concatenate(optional), required_hours)
+        optional_hours = optional_hours[(optional_hours > 0) & (optional_hours < total_hours)]
+
+        # 보조 격자점 솎아내기: 균일 격자 간격 × stride 구간마다 첫 점만 유지 (budget 이하가 될 때까지 stride 증가)
+        step = total_hours / max(num_points - 1, 1)
+        stride = 1
+        while len(optional_hours) > budget:
+            _, first = np.unique(np.floor(optional_hours / (step * stride)), return_index=True)
+            optional_hours = optional_hours[first]
+            stride += 1
+        return np.union1d(required_hours, optional_hours)
+
+    def _get_item_pk(self, drug_name, drug_info, pk_params=None):
+        """약물의 (ka, ke, 농도 배율): 개인별 피팅값(pk_params)이 있으면 우선 사용"""
+        if pk_params and drug_name in pk_params:
+            fitted = pk_params[drug_name]
+            return float(fitted['ka']), float(fitted['ke']), float(fitted.get('scale', 1.0))
+        ka, ke = self._get_ka_ke(drug_info)
+        return ka, ke, 1.0
+
+    def _get_model_terms(self, drug_info, ka, ke):
+        """
+        약물의 PK 모델 지수항 분해 (pk_models 레지스트리)
+        기본 1구획 모델이면 None을 반환하며, 이 경우 기존 Bateman 경로(계수/단위 곡선 캐시)를 그대로 사용합니다.
+        """
+        model = pk_models.get_pk_model(drug_info)
+        if model.name == pk_models.DEFAULT_PK_MODEL:
+            return None
+        return model.kernel_terms(ka, ke, model.resolve_params(drug_info.model_params))
+
+    @staticmethod
+    def _require_default_model(drug_info, feature):
+        """Bateman 전용 계산(스트리밍, Monte Carlo, 피팅)에 1구획 외 PK 모델 약물이 들어오면 ValueError"""
+        model_name = pk_models.get_pk_model(drug_info).name
+        if model_name != pk_models.DEFAULT_PK_MODEL:
+            raise ValueError(f"{feature} supports only the {pk_models.DEFAULT_PK_MODEL} PK model. Got {model_name}")
+
+    def _get_item_kernel(self, item, calibration_factors, pk_params=None):
+        """
+        스케줄 항목의 (투약당 배율, 지수항 분해) - fused 중첩용
+        시뮬레이션 대상이 아닌 항목(간격이 너무 짧거나 DB에 없는 약물)은 None을 반환합니다.
+        """
+        if float(item['interval']) < 0.01 or item['name'] not in data.DRUG_DB:
+            return None
+        drug_info = data.DRUG_DB[item['name']]
+        route_type = drug_info.type
+        f, ef = drug_info.bioavailability, drug_info.ester_factor
+        ka, ke, scale = self._get_item_pk(item['name'], drug_info, pk_params)
+        factor = calibration_factors.get(route_type, 1.0) * scale
+
+        terms = self._get_model_terms(drug_info, ka, ke)
+        if terms is None:
+            coefficient, ka = self._get_cached_coefficient(item['dose'], ka, ke, f, ef, route_type)
+            return coefficient * factor, [(1.0, ke, 0.0), (-1.0, ka, 0.0)]
+        effective_dose_ng, volume = self._get_effective_dose_and_volume(item['dose'], f, ef, route_type)
+        return effective_dose_ng / volume * factor, terms
+
+    def _simulate_item(self, item, t_hours, total_hours, calibration_factors, stop_day=None, resume_day=None, method="loop", grid_key=None, pk_params=None, pauses=None, interactions=()):
+        """
+        단일 스케줄 항목의 농도 곡선 (보정계수 반영)
+        시뮬레이션 대상이 아닌 항목(간격이 너무 짧거나 DB에 없는 약물)은 None을 반환합니다.
+        병용 구간(interactions)은 캐시된 기본 곡선에 영향받는 투약만의 보정 중첩을 더해 반영합니다.
+        """
+        conc = self._simulate_item_base(item, t_hours, total_hours, calibration_factors, stop_day, resume_day, method, grid_key, pk_params, pauses)
+        if conc is None or not interactions:
+            return conc
+
+        dose_times = self._get_dose_times(item, total_hours, stop_day, resume_day, pauses)
+        modifier = self._get_interaction_modifier(dose_times, data.DRUG_DB[item['name']], interactions)
+        affected = modifier != 1.0
+        if not np.any(affected):
+            return conc
+        weight, terms = self._get_item_kernel(item, calibration_factors, pk_params)
+        superpose_dose_groups(t_hours, [(dose_times[affected], (modifier[affected] - 1.0) * weight, terms)], out=conc)
+        return np.maximum(conc, 0)
+
+    def _simulate_item_base(self, item, t_hours, total_hours, calibration_factors, stop_day=None, resume_day=None, method="loop", grid_key=None, pk_params=None, pauses=None):
+        """병용 약물을 반영하지 않은 단일 스케줄 항목의 농도 곡선 (_simulate_item 참고)"""
+        drug_name = item['name']
+        dose = item['dose']
+        interval_days = float(item['interval'])
+        
+        # [Safety Check] interval이 0이거나 너무 작으면 연산량 폭증으로 앱이 멈출 수 있음
+        if interval_days < 0.01:
+            return None
+        
+        if drug_name not in data.DRUG_DB:
+            return None
+            
+        drug_info = data.DRUG_DB[drug_name]
+        route_type = drug_info.type
+        
+        cf = calibration_factors.get(route_type, 1.0)
+
+        # [핵심] 여기서 Newton Method가 적용된 값(또는 개인별 피팅값)을 받아옵니다.
+        ka, ke, scale = self._get_item_pk(drug_name, drug_info, pk_params)
+        f = drug_info.bioavailability
+        ef = drug_info.ester_factor
+
+        terms = self._get_model_terms(drug_info, ka, ke)
+        if terms is not None:
+            # 1구획 외 모델: 지수항 진폭이 모양을 담으므로 계수는 용량/분포용적
+            effective_dose_ng, volume = self._get_effective_dose_and_volume(dose, f, ef, route_type)
+            unit_curve = self._get_unit_response(item, ka, ke, t_hours, total_hours, stop_day, resume_day, method, grid_key, terms, pauses)
+            return unit_curve * (effective_dose_ng / volume * cf * scale)
+
+        coefficient, ka_adj = self._get_cached_coefficient(dose, ka, ke, f, ef, route_type)
+        unit_curve = self._get_unit_response(item, ka_adj, ke, t_hours, total_hours, stop_day, resume_day, method, grid_key, pauses=pauses)
+        return unit_curve * (coefficient * cf * scale)
+
+    def _get_fused_groups(self, schedule_list, total_hours, calibration_factors, stop_day=None, resume_day=None, pk_params=None, pauses=(), interactions=(), components=None):
+        """
+        fused 중첩용 투약 그룹을 성분 라벨별로 모음: {라벨: [(투약 시각(h), 투약별 배율, 지수항 분해), ...]}
+        성분 분해가 없으면 모든 그룹이 라벨 None 아래에 모입니다.
+        """
+        label_groups: Dict[Optional[str], List[Tuple[np.ndarray, np.ndarray, Any]]] = {}
+        for item in schedule_list:
+            kernel = self._get_item_kernel(item, calibration_factors, pk_params)
+            if kernel is None:
+                continue
+            weight, terms = kernel
+            dose_times = self._get_dose_times(item, total_hours, stop_day, resume_day, pauses)
+            weights = weight * self._get_interaction_modifier(dose_times, data.DRUG_DB[item['name']], interactions)
+            label = None if components is None else self._get_component_label(item['name'], components)
+            label_groups.setdefault(label, []).append((dose_times, weights, terms))
+        return label_groups
+
+    @staticmethod
+    def _get_component_label(drug_name, components):
+        """성분 분해 라벨: 약물명 / 투여 경로 / 분석물 (에스트로겐 경로는 "E2", 그 외는 약물명)"""
+        route_type = data.DRUG_DB[drug_name].type
+        if components == "drug":
+            return drug_name
+        if components == "route":
+            return route_type
+        return "E2" if route_type in ESTROGEN_ROUTES else drug_name
+
     def simulate_schedule(
         self, 
         schedule_list: List[Dict[str, Any]], 
@@ -149,135 +995,1608 @@ class HormoneAnalyzer:
         resolution: int = 100, 
         calibration_factors: Optional[Dict[str, float]] = None, 
         stop_day: Optional[int] = None, 
-        resume_day: Optional[int] = None
-    ) -> Tuple[np.ndarray, np.ndarray]:
+        resume_day: Optional[int] = None,
+        method: str = "loop",
+        grid: str = "uniform",
+        components: Optional[str] = None,
+        pk_params: Optional[Dict[str, Dict[str, float]]] = None,
+        pauses: Optional[List[Tuple[float, Optional[float]]]] = None,
+        interactions: Optional[List[Tuple[float, Optional[float], str]]] = None,
+        tail_tolerance: Optional[float] = None
+    ) -> Tuple[Any, ...]:
         """
         전체 스케줄 시뮬레이션 (중첩 원리)
         :param resume_day: 투약 재개일 (중단 후 다시 시작하는 날짜)
+        :param method: 중첩 계산 방식
+            - "loop": 투약마다 Bateman 곡선을 더하는 기준(Reference) 구현, O(투약 수 × 격자점)
+            - "closed_form": 등비급수 폐형식, 격자점당 O(1) (주기/중단/재개 스케줄 지원)
+            - "fft": 임펄스 열과 단위 응답의 FFT 합성곱, O(N log N) (임의 투약열 지원)
+            - "fused": 모든 약물의 투약을 하나의 출력 배열에 단일 루프로 누적, 무시할 수 있는 잔여 기여
+              (EVENT_TAIL_EPSILON 미만)는 생략 (Numba 설치 시 JIT 커널, 없으면 NumPy 슬라이딩 윈도우)
+        :param grid: 시간 격자
+            - "uniform": 하루 resolution개의 균일 격자
+            - "adaptive": 투약 시각과 누적 농도 피크 시각을 포함하고 흡수 구간에 밀집된 비균일 격자
+              (격자점 수 < 균일 격자, 반환되는 t_days도 비균일, fft 미지원, _build_adaptive_grid 참고)
+        :param components: 성분 분해 기준 ("drug": 약물별, "route": 투여 경로별, "analyte": 분석물별 - simulate_analytes 참고)
+            지정 시 같은 계산에서 얻은 성분을 세 번째 값으로 함께 반환합니다.
+            {"labels": [약물명 또는 경로], "matrix": (성분 수 × 시간) 배열}
+        :param pk_params: 개인별 PK 피팅 결과 {약물명: {"ka", "ke", "scale"}} (fit_pk_parameters 참고)
+        :param pauses: 추가 투약 중단 구간 [(중단일, 재개일 또는 None), ...] (여러 차례의 수술/시술 등, stop_day/resume_day와 함께 적용)
+        :param interactions: 병용 약물 구간 [(시작일, 종료일 또는 None, data.INTERACTION_DB 약물명), ...]
+            구간 안에 투여된 CYP3A4 기질 약물(DrugInfo.metabolism)의 용량에 potency를 곱합니다 (억제제 > 1, 유도제 < 1).
+        :param tail_tolerance: fused 전용, 투약 1회당 생략 허용 농도 (pg/mL)
+            약물별 ka/ke로 기여가 이 값 미만이 되는 시간 이후를 계산하지 않습니다 (오차 상한은 calculate_truncation_error_bound).
+        약물별 PK 모델은 pk_models 레지스트리에서 선택되며 (DrugInfo.pk_model), 모든 method에서 같은 결과를 냅니다.
         """
+        if method not in SIMULATION_METHODS:
+            raise ValueError(f"Unknown simulation method: {method}. Expected one of {SIMULATION_METHODS}")
+        if grid not in GRID_MODES:
+            raise ValueError(f"Unknown grid mode: {grid}. Expected one of {GRID_MODES}")
+        if grid == "adaptive" and method == "fft":
+            raise ValueError("The fft method requires a uniform grid.")
+        if components is not None and components not in COMPONENT_GROUPS:
+            raise ValueError(f"Unknown component grouping: {components}. Expected one of {COMPONENT_GROUPS}")
+        if tail_tolerance is not None and method != "fused":
+            raise ValueError("tail_tolerance requires the fused method.")
         if calibration_factors is None:
             calibration_factors = {}
+        pauses = _normalize_pauses(pauses)
+        interactions = _normalize_interactions(interactions)
 
         total_hours = days * 24
         num_points = int(days * resolution)
         
-        t_hours = np.linspace(0, total_hours, num_points)
+        t_hours = None
+        if grid == "adaptive":
+            t_hours = self._build_adaptive_grid(schedule_list, total_hours, resolution, stop_day, resume_day, pauses, pk_params)
+            # 투약 시각/피크만으로 균일 격자 이상인 경우 (격자에 비해 투약이 매우 잦음) -> 균일 격자로 대체
+            if t_hours is None:
+                grid = "uniform"
+        if t_hours is None:
+            t_hours = np.linspace(0, total_hours, num_points)
         total_conc = np.zeros_like(t_hours)
+        grid_key = self._get_grid_key(t_hours, total_hours, grid)
+        grouped: Dict[str, np.ndarray] = {}
 
-        if not schedule_list:
+        if method == "fused":
+            # 성분(라벨)별로 모든 항목의 투약을 모아 한 번에 누적 (성분 분해가 없으면 총 농도 배열에 직접)
+            label_groups = self._get_fused_groups(
+                schedule_list, total_hours, calibration_factors, stop_day, resume_day, pk_params, pauses, interactions, components
+            )
+            for label, groups in label_groups.items():
+                if label is None:
+                    superpose_dose_groups(t_hours, groups, out=total_conc, tail_tolerance=tail_tolerance)
+                else:
+                    grouped[label] = superpose_dose_groups(t_hours, groups, tail_tolerance=tail_tolerance)
+                    total_conc += grouped[label]
+        else:
+            for item in schedule_list:
+                component = self._simulate_item(item, t_hours, total_hours, calibration_factors, stop_day, resume_day, method, grid_key, pk_params, pauses, interactions)
+                if component is None:
+                    continue
+                total_conc += component
+
+                if components is not None:
+                    label = self._get_component_label(item['name'], components)
+                    if label in grouped:
+                        grouped[label] = grouped[label] + component
+                    else:
+                        grouped[label] = component
+        
+        if components is None:
             return t_hours / 24, total_conc
 
-        for item in schedule_list:
-            drug_name = item['name']
-            dose = item['dose']
-            interval_days = float(item['interval'])
-            
-            # [Safety Check] interval이 0이거나 너무 작으면 연산량 폭증으로 앱이 멈출 수 있음
-            if interval_days < 0.01:
-                continue
-            
-            is_cycling = item.get('is_cycling', False)
-            offset_days = item.get('offset', 0.0)
-            duration_days = item.get('duration', 1.0)
-            
-            if drug_name not in data.DRUG_DB:
+        labels = list(grouped.keys())
+        matrix = np.vstack([grouped[label] for label in labels]) if labels else np.zeros((0, len(t_hours)))
+        return t_hours / 24, total_conc, {"labels": labels, "matrix": matrix}
+
+    def concentration_at(
+        self,
+        schedule_list: List[Dict[str, Any]],
+        times,
+        calibration_factors: Optional[Dict[str, float]] = None,
+        stop_day: Optional[int] = None,
+        resume_day: Optional[int] = None,
+        pk_params: Optional[Dict[str, Dict[str, float]]] = None,
+        pauses: Optional[List[Tuple[float, Optional[float]]]] = None,
+        interactions: Optional[List[Tuple[float, Optional[float], str]]] = None
+    ) -> np.ndarray:
+        """
+        임의 시각(일)에서의 총 농도 - 시간 격자 없이 해당 시각만 정확히 평가 (검사 시각, 수술일 등)
+        조회 시각마다 살아있는 투약(잔여 기여 EVENT_TAIL_EPSILON 이상)만 더하므로 O(조회 수 × 윈도우 내 투약 수)이며,
+        같은 인자의 simulate_schedule 곡선과 격자점에서 일치합니다 (격자 최근접값으로 인한 양자화 없음).
+        :param times: 조회 시각 (일, 소수 가능) - 스칼라 또는 배열, 순서 무관
+        :return: times와 같은 모양의 농도 배열 (pg/mL)
+        """
+        if calibration_factors is None:
+            calibration_factors = {}
+        query_days = np.asarray(times, dtype=float)
+        query_hours = query_days.ravel() * 24
+        if query_hours.size == 0:
+            return np.zeros(query_days.shape)
+
+        # 마지막 조회 시각까지의 투약만 생성 (조회 시각과 같은 시각의 투약은 기여 0)
+        label_groups = self._get_fused_groups(
+            schedule_list, max(float(query_hours.max()), 0.0), calibration_factors, stop_day, resume_day, pk_params,
+            _normalize_pauses(pauses), _normalize_interactions(interactions)
+        )
+        order = np.argsort(query_hours, kind="stable")
+        conc = np.zeros(query_hours.size)
+        conc[order] = superpose_dose_groups(query_hours[order], label_groups.get(None, []))
+        return conc.reshape(query_days.shape)
+
+    def time_to_threshold(
+        self,
+        schedule_list: List[Dict[str, Any]],
+        threshold: float,
+        start_day: float,
+        direction: str = "below",
+        calibration_factors: Optional[Dict[str, float]] = None,
+        stop_day: Optional[int] = None,
+        resume_day: Optional[int] = None,
+        pk_params: Optional[Dict[str, Dict[str, float]]] = None,
+        pauses: Optional[List[Tuple[float, Optional[float]]]] = None,
+        interactions: Optional[List[Tuple[float, Optional[float], str]]] = None,
+        max_days: float = 365
+    ) -> Optional[float]:
+        """
+        start_day 이후 총 농도가 threshold에 처음 도달하는 시각(일) - 시간 격자 없이 정확히 계산
+        - "below": C(t) <= threshold (예: 중단 후 수술 안전 수치 GUIDELINES["SURGERY_SAFETY"]["e2_max"] 도달일)
+        - "above": C(t) >= threshold (예: 재개 후 목표 수치 GUIDELINES["WPATH_SOC8"]["e2_min"] 회복일)
+        투약(및 지수항 지연) 시각 사이 구간에서 곡선은 지수함수의 합이므로,
+        구간마다 살아있는 지수항의 계수를 속도별로 모아 첫 근을 찾습니다 (_exp_sum_roots).
+        :return: 도달 시각(일) - start_day에 이미 만족하면 start_day, max_days까지 도달하지 않으면 None
+        """
+        if direction not in THRESHOLD_DIRECTIONS:
+            raise ValueError(f"Unknown threshold direction: {direction}. Expected one of {THRESHOLD_DIRECTIONS}")
+        if calibration_factors is None:
+            calibration_factors = {}
+        start_hours, end_hours = float(start_day) * 24, float(max_days) * 24
+        if end_hours < start_hours:
+            return None
+
+        groups = self._get_fused_groups(
+            schedule_list, end_hours, calibration_factors, stop_day, resume_day, pk_params,
+            _normalize_pauses(pauses), _normalize_interactions(interactions)
+        ).get(None, [])
+        # 투약 × 지수항을 시작 시각 순 (시작 시각, 속도, 진폭) 배열로 펼침
+        onsets = np.concatenate([dose_times + d for dose_times, _, terms in groups for _, _, d in terms] or [np.zeros(0)])
+        rates = np.concatenate([np.full(len(dose_times), k) for dose_times, _, terms in groups for _, k, _ in terms] or [np.zeros(0)])
+        amps = np.concatenate([weights * a for _, weights, terms in groups for a, _, _ in terms] or [np.zeros(0)])
+        order = np.argsort(onsets, kind="stable")
+        onsets, rates, amps = onsets[order], rates[order], amps[order]
+        unique_rates, rate_index = np.unique(rates, return_inverse=True)
+        decaying = unique_rates > 0
+
+        # 속도별 계수 (구간 시작 시각 기준): 구간마다 감쇠시키고 새로 시작된 항만 더함
+        n_active = int(np.searchsorted(onsets, start_hours, side="right"))
+        coefficients = np.bincount(
+            rate_index[:n_active], weights=amps[:n_active] * np.exp(-rates[:n_active] * (start_hours - onsets[:n_active])),
+            minlength=len(unique_rates)
+        ).astype(float)
+
+        # sign * (C - threshold) <= 0 이면 도달
+        sign = 1.0 if direction == "below" else -1.0
+        breaks = np.unique(onsets[(onsets > start_hours) & (onsets < end_hours)])
+        for lo, hi in zip(np.concatenate([[start_hours], breaks]), np.concatenate([breaks, [end_hours]])):
+            const = sign * (coefficients[~decaying].sum() - threshold)
+            live = decaying & (coefficients != 0)
+            amplitudes = sign * coefficients[live]
+            if const + amplitudes.sum() <= 0:
+                return float(lo / 24)
+            roots = _exp_sum_roots(amplitudes, unique_rates[live], const, 0.0, float(hi - lo))
+            if roots:
+                return float((lo + roots[0]) / 24)
+
+            coefficients *= np.exp(-unique_rates * (hi - lo))
+            n_next = int(np.searchsorted(onsets, hi, side="right"))
+            coefficients += np.bincount(rate_index[n_active:n_next], weights=amps[n_active:n_next], minlength=len(unique_rates))
+            n_active = n_next
+        return None
+
+    def calculate_truncation_error_bound(
+        self,
+        schedule_list: List[Dict[str, Any]],
+        days: int = 30,
+        resolution: int = 100,
+        calibration_factors: Optional[Dict[str, float]] = None,
+        stop_day: Optional[int] = None,
+        resume_day: Optional[int] = None,
+        pk_params: Optional[Dict[str, Dict[str, float]]] = None,
+        pauses: Optional[List[Tuple[float, Optional[float]]]] = None,
+        interactions: Optional[List[Tuple[float, Optional[float], str]]] = None,
+        tail_tolerance: Optional[float] = None
+    ) -> float:
+        """
+        simulate_schedule(method="fused")의 잔여 기여 생략으로 인한 총 농도 최대 절대오차 상한 (pg/mL)
+        같은 인자로 시뮬레이션한 곡선은 모든 격자점에서 정확한 중첩과 이 값 이내로 일치합니다. (truncation_error_bound 참고)
+        """
+        if calibration_factors is None:
+            calibration_factors = {}
+        total_hours = days * 24
+        t_hours = np.linspace(0, total_hours, int(days * resolution))
+        label_groups = self._get_fused_groups(
+            schedule_list, total_hours, calibration_factors, stop_day, resume_day, pk_params,
+            _normalize_pauses(pauses), _normalize_interactions(interactions)
+        )
+        groups = label_groups.get(None, [])
+        if not groups or len(t_hours) == 0:
+            return 0.0
+        return float(truncation_error_bound(t_hours, groups, tail_tolerance=tail_tolerance).max())
+
+    def _get_event_groups(self, events, calibration_factors, pk_params=None, interactions=(), components=None):
+        """
+        실제 투약 기록을 fused 중첩용 투약 그룹으로 변환: {라벨: [(투약 시각(h), 투약별 농도 배율, 지수항 분해), ...]}
+        약물마다 그룹 하나를 만들며, 성분 분해가 없으면 모든 그룹이 라벨 None 아래에 모입니다. DB에 없는 약물은 건너뜁니다.
+        """
+        # 약물별 (투약 시각(h), 용량) 분리
+        by_drug: Dict[str, List[Tuple[float, float]]] = {}
+        for event in events:
+            if event['name'] not in data.DRUG_DB:
                 continue
-                
+            by_drug.setdefault(event['name'], []).append((float(event['day']) * 24, float(event['dose'])))
+
+        label_groups: Dict[Optional[str], List[Tuple[np.ndarray, np.ndarray, Any]]] = {}
+        for drug_name, records in by_drug.items():
             drug_info = data.DRUG_DB[drug_name]
-            route_type = drug_info.type
-            
-            cf = calibration_factors.get(route_type, 1.0)
+            records_arr = np.array(records)
+            order = np.argsort(records_arr[:, 0], kind="stable")
+            dose_times, doses = records_arr[order, 0], records_arr[order, 1]
+
+            ka, ke, scale = self._get_item_pk(drug_name, drug_info, pk_params)
+            f, ef, route_type = drug_info.bioavailability, drug_info.ester_factor, drug_info.type
+            terms = self._get_model_terms(drug_info, ka, ke)
+            if terms is None:
+                # 농도는 용량에 정비례하므로 1 mg 계수 × 이벤트별 용량
+                unit_coefficient, ka = self._get_cached_coefficient(1.0, ka, ke, f, ef, route_type)
+                terms = [(1.0, ke, 0.0), (-1.0, ka, 0.0)]
+            else:
+                effective_dose_ng, volume = self._get_effective_dose_and_volume(1.0, f, ef, route_type)
+                unit_coefficient = effective_dose_ng / volume
+
+            weights = doses * (unit_coefficient * calibration_factors.get(route_type, 1.0) * scale)
+            weights *= self._get_interaction_modifier(dose_times, drug_info, interactions)
+            label = None if components is None else self._get_component_label(drug_name, components)
+            label_groups.setdefault(label, []).append((dose_times, weights, terms))
+        return label_groups
 
-            # [핵심] 여기서 Newton Method가 적용된 값을 받아옵니다.
+    def simulate_events(
+        self,
+        events: List[Dict[str, Any]],
+        days: Optional[float] = None,
+        resolution: int = 24,
+        calibration_factors: Optional[Dict[str, float]] = None,
+        components: Optional[str] = None,
+        pk_params: Optional[Dict[str, Dict[str, float]]] = None,
+        interactions: Optional[List[Tuple[float, Optional[float], str]]] = None,
+        tail_tolerance: Optional[float] = None
+    ) -> Tuple[Any, ...]:
+        """
+        실제 투약 기록(이벤트) 기반 시뮬레이션
+        누락/지연 투약, 용량 변경이 있는 실제 기록을 그대로 중첩합니다 (loop 방식과 같은 곡선).
+        :param events: [{"day": 투약 시각(일, 소수 가능), "name": 약물명, "dose": 용량(mg)}, ...] - 순서 무관
+            DB에 없는 약물은 건너뜁니다.
+        :param days: 시뮬레이션 기간, 생략 시 마지막 투약일 + 1일
+        :param components: 성분 분해 기준 ("drug" 또는 "route", simulate_schedule 참고)
+        :param pk_params: 개인별 PK 피팅 결과 (simulate_schedule 참고)
+        :param interactions: 병용 약물 구간 (simulate_schedule 참고)
+        :param tail_tolerance: 투약 1회당 생략 허용 농도 (pg/mL, simulate_schedule 참고)
+        :return: (t_days, 농도) 또는 components 지정 시 (t_days, 농도, {"labels", "matrix"})
+        """
+        if components is not None and components not in COMPONENT_GROUPS:
+            raise ValueError(f"Unknown component grouping: {components}. Expected one of {COMPONENT_GROUPS}")
+        if calibration_factors is None:
+            calibration_factors = {}
+        interactions = _normalize_interactions(interactions)
+
+        label_groups = self._get_event_groups(events, calibration_factors, pk_params, interactions, components)
+        if days is None:
+            last_hour = max((float(times.max()) for groups in label_groups.values() for times, _, _ in groups), default=0.0)
+            days = math.ceil(last_hour / 24) + 1
+        total_hours = days * 24
+        t_hours = np.linspace(0, total_hours, int(days * resolution))
+        total_conc = np.zeros_like(t_hours)
+        grouped: Dict[str, np.ndarray] = {}
+
+        for label, groups in label_groups.items():
+            for group in groups:
+                component = superpose_dose_groups(t_hours, [group], tail_tolerance=tail_tolerance)
+                total_conc += component
+                if label is not None:
+                    grouped[label] = grouped[label] + component if label in grouped else component
+
+        if components is None:
+            return t_hours / 24, total_conc
+
+        labels = list(grouped.keys())
+        matrix = np.vstack([grouped[label] for label in labels]) if labels else np.zeros((0, len(t_hours)))
+        return t_hours / 24, total_conc, {"labels": labels, "matrix": matrix}
+
+    def simulate_analytes(
+        self,
+        schedule_list: List[Dict[str, Any]],
+        days: int = 30,
+        resolution: int = 100,
+        calibration_factors: Optional[Dict[str, float]] = None,
+        stop_day: Optional[int] = None,
+        resume_day: Optional[int] = None,
+        method: str = "closed_form",
+        pk_params: Optional[Dict[str, Dict[str, float]]] = None,
+        pauses: Optional[List[Tuple[float, Optional[float]]]] = None,
+        interactions: Optional[List[Tuple[float, Optional[float], str]]] = None
+    ) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """
+        다중 분석물 시뮬레이션: 처방 전체(항안드로겐/프로게스테론/GnRH 포함)를 한 번에 계산하여 분석물별 곡선 반환
+        - "E2": 에스트로겐 경로(ESTROGEN_ROUTES) 약물 합 (pg/mL)
+        - 그 외 약물: 약물명별 혈중 농도 (pg/mL, 해당 경로의 ROUTE_CONSTANTS Vd 기준)
+        - "T": 위 노출로 구동되는 예상 총 테스토스테론 (ng/dL, data.TESTOSTERONE_PD 간접 반응 모델)
+        분석물 곡선은 simulate_schedule(components="analyte")의 성분 분해 한 번으로 얻습니다.
+        :return: (t_days, {분석물: 곡선}) - 처방에 없는 분석물은 포함되지 않으며 "T"는 항상 포함
+        """
+        t_days, _, parts = self.simulate_schedule(
+            schedule_list, days=days, resolution=resolution, calibration_factors=calibration_factors,
+            stop_day=stop_day, resume_day=resume_day, method=method, components="analyte",
+            pk_params=pk_params, pauses=pauses, interactions=interactions
+        )
+        analytes = dict(zip(parts["labels"], parts["matrix"]))
+        analytes["T"] = self._testosterone_response(t_days * 24, analytes)
+        return t_days, analytes
+
+    @staticmethod
+    def _testosterone_response(t_hours, analytes):
+        """
+        억제 분석물 노출에 따른 총 테스토스테론 곡선 (ng/dL, 균일 격자)
+        간접 반응 모델을 격자 간격 동안 억제율이 일정하다고 보고 정확히 이산화하면
+            T[n+1] = a * T[n] + (1 - a) * baseline * (1 - I[n]),  a = exp(-k_out * dt)
+        이고, 이 선형 점화식을 기하 커널 a^m과의 FFT 합성곱으로 한 번에 계산합니다.
+        """
+        pd_model = data.TESTOSTERONE_PD
+        baseline = pd_model["baseline"]
+        num_points = len(t_hours)
+        if num_points == 0:
+            return np.zeros(0)
+
+        remaining = np.ones(num_points)
+        for analyte, (i_max, ic50, hill) in pd_model["drivers"].items():
+            if analyte in analytes:
+                conc = np.maximum(analytes[analyte], 0.0)
+                remaining *= 1.0 - i_max * conc ** hill / (ic50 ** hill + conc ** hill)
+        if num_points < 2:
+            return np.full(num_points, baseline)
+
+        dt = t_hours[1] - t_hours[0]
+        a = np.exp(-np.log(2) / pd_model["turnover_half_life"] * dt)
+        drive = (1.0 - a) * baseline * remaining[:-1]
+
+        # T[n] = a^n * baseline + Σ_{k<n} a^(n-1-k) * drive[k]
+        n_fft = 2 * num_points
+        kernel = a ** np.arange(num_points - 1)
+        accumulated = np.fft.irfft(np.fft.rfft(drive, n_fft) * np.fft.rfft(kernel, n_fft), n_fft)[:num_points - 1]
+        response = baseline * a ** np.arange(num_points)
+        response[1:] += accumulated
+        return np.maximum(response, 0)
+
+    def simulate_schedule_stream(
+        self,
+        schedule_list: List[Dict[str, Any]],
+        days: int = 365,
+        resolution: int = 24,
+        calibration_factors: Optional[Dict[str, float]] = None,
+        stop_day: Optional[int] = None,
+        resume_day: Optional[int] = None,
+        chunk_days: float = STREAM_CHUNK_DAYS,
+        pauses: Optional[List[Tuple[float, Optional[float]]]] = None
+    ) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """
+        장기(수년) 시뮬레이션용 청크 단위 제너레이터: (t_days 청크, 농도 청크)를 차례로 반환
+        simulate_schedule(method="closed_form")과 같은 균일 격자를 chunk_days 길이로 나누어 계산하므로
+        메모리 사용량은 전체 기간이 아닌 청크 크기에 비례합니다.
+
+        지수항 exp(-k(t - t_i))의 합은 청크 경계 시각 t_ref에서
+            Σ exp(-k(t - t_i)) = exp(-k(t - t_ref)) * Σ exp(-k(t_ref - t_i))
+        로 분리되므로, 지난 투약들의 잔여 기여는 약물별 누적값(ke/ka 각 1개)으로만 다음 청크에 전달됩니다.
+        """
+        if chunk_days <= 0:
+            raise ValueError(f"chunk_days must be positive, got {chunk_days}")
+        if calibration_factors is None:
+            calibration_factors = {}
+
+        total_hours = days * 24
+        num_points = int(days * resolution)
+        if num_points < 1:
+            return
+        step_hours = total_hours / (num_points - 1) if num_points > 1 else 0.0
+        chunk_points = max(int(round(chunk_days * resolution)), 1)
+
+        # 약물별 상태: [계수, ka, ke, 정렬된 투약 시각(h), 다음 투약 인덱스, ke 누적값, ka 누적값]
+        states = []
+        for item in schedule_list:
+            if float(item['interval']) < 0.01 or item['name'] not in data.DRUG_DB:
+                continue
+            drug_info = data.DRUG_DB[item['name']]
+            self._require_default_model(drug_info, "simulate_schedule_stream")
             ka, ke = self._get_ka_ke(drug_info)
-            f = drug_info.bioavailability
-            ef = drug_info.ester_factor
+            coefficient, ka = self._get_cached_coefficient(
+                item['dose'], ka, ke, drug_info.bioavailability, drug_info.ester_factor, drug_info.type
+            )
+            coefficient *= calibration_factors.get(drug_info.type, 1.0)
+            dose_times = np.sort(self._get_dose_times(item, total_hours, stop_day, resume_day, pauses))
+            states.append([coefficient, ka, ke, dose_times, 0, 0.0, 0.0])
 
-            cycle_starts = np.arange(0, total_hours, interval_days * 24)
-            all_dose_times = []
-            
-            for start_time in cycle_starts:
-                if is_cycling:
-                    for d in range(int(duration_days)):
-                        dose_time = start_time + (offset_days * 24) + (d * 24)
-                        if dose_time < total_hours:
-                            all_dose_times.append(dose_time)
-                else:
-                    all_dose_times.append(start_time)
+        t_ref = 0.0
+        for start in range(0, num_points, chunk_points):
+            stop = min(start + chunk_points, num_points)
+            t_chunk = np.arange(start, stop) * step_hours
+            # 다음 청크의 첫 시각 (마지막 청크는 전체 기간 끝)
+            t_next = stop * step_hours if stop < num_points else total_hours + step_hours
+            conc = np.zeros(len(t_chunk))
+
+            for state in states:
+                coefficient, ka, ke, dose_times, next_idx, acc_e, acc_a = state
+                since_ref = t_chunk - t_ref
+                unit = acc_e * np.exp(-ke * since_ref) - acc_a * np.exp(-ka * since_ref)
+
+                # 이번 청크 구간 [t_ref, t_next)에 새로 투약된 분량
+                end_idx = int(np.searchsorted(dose_times, t_next, side="left"))
+                new_doses = dose_times[next_idx:end_idx]
+                if len(new_doses) > 0:
+                    elapsed = t_chunk[None, :] - new_doses[:, None]
+                    valid = elapsed >= 0
+                    elapsed = np.where(valid, elapsed, 0.0)
+                    unit += np.sum(np.where(valid, np.exp(-ke * elapsed) - np.exp(-ka * elapsed), 0.0), axis=0)
+
+                conc += np.maximum(unit, 0) * coefficient
+
+                # 잔여 기여를 다음 청크 경계 시각으로 이월
+                span = t_next - t_ref
+                state[4] = end_idx
+                state[5] = acc_e * np.exp(-ke * span) + float(np.sum(np.exp(-ke * (t_next - new_doses))))
+                state[6] = acc_a * np.exp(-ka * span) + float(np.sum(np.exp(-ka * (t_next - new_doses))))
+
+            t_ref = t_next
+            yield t_chunk / 24, conc
+
+    def _superpose_closed_form_batch(self, t, runs, ka, ke):
+        """
+        _superpose_closed_form의 다중 파라미터 버전
+        ka, ke: (샘플 수,) 배열 -> (샘플 수 × 격자점) 단위 응답 행렬
+        투약 횟수/경과시간은 파라미터와 무관하므로 한 번만 계산하고 지수항만 브로드캐스팅합니다.
+        """
+        ka = np.asarray(ka, dtype=float)[:, None]
+        ke = np.asarray(ke, dtype=float)[:, None]
+        conc = np.zeros((ka.shape[0], len(t)))
+
+        for t_first, period, count in runs:
+            elapsed = t - t_first
+            active = elapsed >= 0
+            if not np.any(active):
+                continue
+
+            elapsed = elapsed[active]
+            last_idx = np.minimum(np.floor(elapsed / period), count - 1)
+            n_doses = last_idx + 1
+            since_last = elapsed - last_idx * period
+
+            def _geometric_sum(k):
+                return np.exp(-k * since_last) * (-np.expm1(-k * period * n_doses)) / (-np.expm1(-k * period))
+
+            conc[:, active] += _geometric_sum(ke) - _geometric_sum(ka)
+
+        return np.maximum(conc, 0)
+
+    def simulate_monte_carlo_samples(
+        self,
+        schedule_list: List[Dict[str, Any]],
+        n_samples: int = 1000,
+        days: int = 30,
+        resolution: int = 24,
+        calibration_factors: Optional[Dict[str, float]] = None,
+        stop_day: Optional[int] = None,
+        resume_day: Optional[int] = None,
+        variability: Optional[Dict[str, float]] = None,
+        seed: Any = None,
+        out: Optional[np.ndarray] = None,
+        pauses: Optional[List[Tuple[float, Optional[float]]]] = None,
+        pk_params: Optional[Dict[str, Dict[str, float]]] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        개인차(Population Variability)를 반영한 가상 환자별 농도 곡선
+        DrugInfo의 반감기/Tmax/생체이용률과 환자 분포용적(Vd)을 로그정규분포로 샘플링한 가상 환자
+        n_samples명을 하나의 NumPy 배치(샘플 × 격자점)로 계산합니다.
+        :param variability: 파라미터별 변동계수(CV), 생략된 항목은 MONTE_CARLO_VARIABILITY 사용
+        :param seed: np.random.default_rng에 전달할 시드 (정수 또는 SeedSequence)
+        :param out: 결과를 기록할 (n_samples × 격자점) 배열 (공유 메모리 등), 생략 시 새로 할당
+        :param pk_params: 개인별 PK 피팅 결과 (simulate_schedule 참고) - 피팅된 반감기/Tmax/배율을 중심으로 샘플링
+        :return: (t_days, (샘플 수 × 시간) 농도 배열)
+        """
+        if n_samples < 1:
+            raise ValueError(f"n_samples must be at least 1, got {n_samples}")
+        cvs = dict(MONTE_CARLO_VARIABILITY)
+        if variability:
+            unknown = set(variability) - set(MONTE_CARLO_VARIABILITY)
+            if unknown:
+                raise ValueError(f"Unknown variability parameters: {sorted(unknown)}. Expected some of {tuple(MONTE_CARLO_VARIABILITY)}")
+            cvs.update(variability)
+        if any(cv < 0 for cv in cvs.values()):
+            raise ValueError("Variability (CV) values must be non-negative.")
+        if calibration_factors is None:
+            calibration_factors = {}
+
+        rng = np.random.default_rng(seed)
+        total_hours = days * 24
+        t_hours = np.linspace(0, total_hours, int(days * resolution))
+        if out is None:
+            total_conc = np.zeros((n_samples, len(t_hours)))
+        else:
+            if out.shape != (n_samples, len(t_hours)):
+                raise ValueError(f"out must have shape {(n_samples, len(t_hours))}, got {out.shape}")
+            total_conc = out
+            total_conc[:] = 0.0
+
+        # 환자별 분포용적 배수는 모든 약물에 공통 적용
+        vd_factors = _lognormal_factors(rng, cvs["vd"], n_samples)
+
+        for item in schedule_list:
+            if float(item['interval']) < 0.01 or item['name'] not in data.DRUG_DB:
+                continue
+            drug_info = data.DRUG_DB[item['name']]
+            self._require_default_model(drug_info, "simulate_monte_carlo_samples")
+
+            # 피팅값이 있으면 피팅된 ka, ke에 해당하는 반감기/Tmax를 분포 중심으로 사용
+            half_life, t_peak, scale = drug_info.half_life, drug_info.t_peak, 1.0
+            if pk_params and item['name'] in pk_params:
+                fit_ka, fit_ke, scale = self._get_item_pk(item['name'], drug_info, pk_params)
+                half_life = np.log(2) / fit_ke
+                t_peak = np.log(fit_ka / fit_ke) / (fit_ka - fit_ke)
+            half_lives = half_life * _lognormal_factors(rng, cvs["half_life"], n_samples)
+            t_peaks = t_peak * _lognormal_factors(rng, cvs["t_peak"], n_samples)
+            ka, ke = solve_ka_ke(half_lives, t_peaks)
+            bioavailability = np.minimum(
+                drug_info.bioavailability * _lognormal_factors(rng, cvs["bioavailability"], n_samples), 1.0
+            )
+
+            # 생체이용률 1 기준, 환자 보정(체중/Vd/체지방/BMI/First-pass/간 기능)이 반영된 용량/분포용적
+            effective_dose_ng, volume = self._get_effective_dose_and_volume(
+                item['dose'], 1.0, drug_info.ester_factor, drug_info.type
+            )
+            dose_per_volume = effective_dose_ng / volume
+            coefficient = (
+                dose_per_volume * bioavailability / vd_factors
+                * ka / (ka - ke) * calibration_factors.get(drug_info.type, 1.0) * scale
+            )
+
+            runs = self._get_dose_runs(item, total_hours, stop_day, resume_day, pauses)
+            total_conc += self._superpose_closed_form_batch(t_hours, runs, ka, ke) * coefficient[:, None]
 
-            if stop_day is not None:
-                if resume_day is not None:
-                    all_dose_times = [dt for dt in all_dose_times if dt <= stop_day * 24 or dt >= resume_day * 24]
-                else:
-                    all_dose_times = [dt for dt in all_dose_times if dt <= stop_day * 24]
-
-            for dose_t in all_dose_times:
-                shifted_t = t_hours - dose_t
-                valid_mask = shifted_t >= 0
-                
-                if np.any(valid_mask):
-                    conc = self.bateman_function(
-                        shifted_t[valid_mask], dose, ka, ke, f, ef,
-                        route_type=route_type
-                    )
-                    total_conc[valid_mask] += (conc * cf)
-        
         return t_hours / 24, total_conc
 
-    def calculate_calibration_factor(self, schedule_list, lab_day, lab_value, target_route="Injection", current_factors=None):
+    def simulate_monte_carlo(
+        self,
+        schedule_list: List[Dict[str, Any]],
+        n_samples: int = 1000,
+        days: int = 30,
+        resolution: int = 24,
+        calibration_factors: Optional[Dict[str, float]] = None,
+        stop_day: Optional[int] = None,
+        resume_day: Optional[int] = None,
+        variability: Optional[Dict[str, float]] = None,
+        percentiles: Tuple[float, ...] = MONTE_CARLO_PERCENTILES,
+        seed: Any = None,
+        pauses: Optional[List[Tuple[float, Optional[float]]]] = None,
+        pk_params: Optional[Dict[str, Dict[str, float]]] = None
+    ) -> Tuple[np.ndarray, Dict[str, Any]]:
+        """
+        Monte Carlo 개인차 시뮬레이션의 백분위 곡선 (simulate_monte_carlo_samples 참고)
+        :return: (t_days, {"percentiles": 백분위 튜플, "bands": (백분위 수 × 시간) 배열})
+        """
+        t_days, curves = self.simulate_monte_carlo_samples(
+            schedule_list, n_samples, days, resolution, calibration_factors,
+            stop_day, resume_day, variability, seed, pauses=pauses, pk_params=pk_params
+        )
+        bands = np.percentile(curves, percentiles, axis=0)
+        return t_days, {"percentiles": tuple(percentiles), "bands": bands}
+
+    def _simulate_route_curves(self, schedule_list, t_hours, total_hours, stop_day=None, resume_day=None, pauses=None):
+        """
+        환자 보정을 제외한 경로별 단위 곡선 (closed_form 기반)
+        반환값: {route_type: 곡선}, 곡선 × (간 기능 × First-pass) / (체중 × Vd × 체지방 × BMI) = 실제 농도
+        """
+        route_curves = {}
+        for item in schedule_list:
+            if float(item['interval']) < 0.01 or item['name'] not in data.DRUG_DB:
+                continue
+
+            drug_info = data.DRUG_DB[item['name']]
+            ka, ke = self._get_ka_ke(drug_info)
+            effective_dose_ng = item['dose'] * drug_info.bioavailability * drug_info.ester_factor * 1_000_000
+
+            terms = self._get_model_terms(drug_info, ka, ke)
+            if terms is not None:
+                curve = self._get_unit_response(item, ka, ke, t_hours, total_hours, stop_day, resume_day, "closed_form", terms=terms, pauses=pauses) * effective_dose_ng
+            else:
+                if ka == ke:
+                    ka = ke + 1e-5
+                base_coefficient = effective_dose_ng * ka / (ka - ke)
+                curve = self._get_unit_response(item, ka, ke, t_hours, total_hours, stop_day, resume_day, "closed_form", pauses=pauses) * base_coefficient
+
+            if drug_info.type in route_curves:
+                route_curves[drug_info.type] += curve
+            else:
+                route_curves[drug_info.type] = curve
+
+        return route_curves
+
+    @staticmethod
+    def _get_steady_phases(item, tau):
+        """항정 상태 투약열의 위상(h): 주기 투약은 주기 내 d일차 투약을 같은 간격의 별도 투약열로 분리"""
+        if item.get('is_cycling', False):
+            offset_hours = item.get('offset', 0.0) * 24
+            return [(offset_hours + d * 24) % tau for d in range(int(item.get('duration', 1.0)))]
+        return [0.0]
+
+    def _get_steady_terms(self, schedule_list, calibration_factors=None, pk_params=None):
+        """
+        항정 상태 계산용 투약열 목록: [(계수, ka, ke, 간격(h), 위상(h)), ...]
+        주기 투약은 주기 내 d일차 투약을 같은 간격의 별도 투약열로 분리합니다.
+        1구획 외 PK 모델 약물은 제외됩니다 (_get_steady_kernel_terms 참고).
+        """
+        if calibration_factors is None:
+            calibration_factors = {}
+
+        terms = []
+        for item in schedule_list:
+            if float(item['interval']) < 0.01 or item['name'] not in data.DRUG_DB:
+                continue
+            drug_info = data.DRUG_DB[item['name']]
+            if pk_models.get_pk_model(drug_info).name != pk_models.DEFAULT_PK_MODEL:
+                continue
+            ka, ke, scale = self._get_item_pk(item['name'], drug_info, pk_params)
+            coefficient, ka = self._get_cached_coefficient(
+                item['dose'], ka, ke, drug_info.bioavailability, drug_info.ester_factor, drug_info.type
+            )
+            coefficient *= calibration_factors.get(drug_info.type, 1.0) * scale
+
+            tau = float(item['interval']) * 24
+            terms.extend((coefficient, ka, ke, tau, phase) for phase in self._get_steady_phases(item, tau))
+        return terms
+
+    def _get_steady_kernel_terms(self, schedule_list, calibration_factors=None, pk_params=None):
+        """
+        1구획 외 PK 모델 약물의 항정 상태 투약열 목록: [(용량/분포용적 계수, 지수항 분해, 간격(h), 위상(h)), ...]
+        """
+        if calibration_factors is None:
+            calibration_factors = {}
+
+        kernel_terms = []
+        for item in schedule_list:
+            if float(item['interval']) < 0.01 or item['name'] not in data.DRUG_DB:
+                continue
+            drug_info = data.DRUG_DB[item['name']]
+            ka, ke, scale = self._get_item_pk(item['name'], drug_info, pk_params)
+            terms = self._get_model_terms(drug_info, ka, ke)
+            if terms is None:
+                continue
+            effective_dose_ng, volume = self._get_effective_dose_and_volume(
+                item['dose'], drug_info.bioavailability, drug_info.ester_factor, drug_info.type
+            )
+            coefficient = effective_dose_ng / volume * calibration_factors.get(drug_info.type, 1.0) * scale
+
+            tau = float(item['interval']) * 24
+            kernel_terms.extend((coefficient, terms, tau, phase) for phase in self._get_steady_phases(item, tau))
+        return kernel_terms
+
+    @staticmethod
+    def _get_common_period(intervals_hours):
+        """
+        투약 간격들의 공통 주기(h): 서로 다른 간격이 하나면 그 간격, 여럿이면 가장 긴 간격의 배수 중
+        모든 간격의 정수배(상대 오차 STEADY_PERIOD_TOLERANCE 이내)가 되는 최소값. 상한을 넘으면 None
+        """
+        distinct = []
+        for tau in sorted(float(tau) for tau in intervals_hours):
+            if not distinct or tau - distinct[-1] > STEADY_PERIOD_TOLERANCE * tau:
+                distinct.append(tau)
+        if len(distinct) <= 1:
+            return distinct[0] if distinct else None
+
+        taus = np.array(distinct)
+        max_multiple = int(STEADY_MAX_PERIOD_DAYS * 24 / taus[-1] * (1 + STEADY_PERIOD_TOLERANCE))
+        for multiple in range(1, max_multiple + 1):
+            period = multiple * taus[-1]
+            ratios = period / taus
+            if np.all(np.abs(ratios - np.round(ratios)) <= STEADY_PERIOD_TOLERANCE * ratios):
+                return period
+        return None
+
+    @staticmethod
+    def _get_steady_points(terms, period):
+        """항정 상태 평가 지점(h): 보조 격자 + 투약열별 투약 시점, 항정 상태 피크, 변곡점"""
+        points = [np.linspace(0, period, max(int(period / 24 * STEADY_RESOLUTION), 2), endpoint=False)]
+        for coefficient, ka, ke, tau, phase in terms:
+            keep_e = -np.expm1(-ke * tau)
+            keep_a = -np.expm1(-ka * tau)
+            s_peak = np.log((ka * keep_e) / (ke * keep_a)) / (ka - ke)
+            s_inflection = np.log((ka ** 2 * keep_e) / (ke ** 2 * keep_a)) / (ka - ke)
+            offsets = np.array([0.0] + [x for x in (s_peak, s_inflection) if 0 < x < tau])
+            dose_starts = phase + tau * np.arange(int(round(period / tau)))
+            points.append((dose_starts[:, None] + offsets[None, :]).ravel())
+        return np.mod(np.concatenate(points), period)
+
+    def _evaluate_steady_state(self, terms, t, kernel_terms=()):
+        """항정 상태 농도 C(t)와 기울기 dC/dt (h 단위) - 주기 투약열별 폐형식 합"""
+        conc = np.zeros_like(t)
+        slope = np.zeros_like(t)
+        for coefficient, ka, ke, tau, phase in terms:
+            since_dose = np.mod(t - phase, tau)
+            acc_e = np.exp(-ke * since_dose) / (-np.expm1(-ke * tau))
+            acc_a = np.exp(-ka * since_dose) / (-np.expm1(-ka * tau))
+            conc += coefficient * (acc_e - acc_a)
+            slope += coefficient * (ka * acc_a - ke * acc_e)
+        for coefficient, kernel, tau, phase in kernel_terms:
+            part_conc, part_slope = pk_models.steady_state_kernel(kernel, np.mod(t - phase, tau), tau)
+            conc += coefficient * part_conc
+            slope += coefficient * part_slope
+        return conc, slope
+
+    def steady_state_stats(self, schedule_list, calibration_factors=None, pk_params=None) -> Optional[Dict[str, float]]:
+        """
+        항정 상태 통계의 해석적 계산 (utils.calculate_stats와 같은 형식의 dict 반환)
+
+        간격 τ의 투약열은 항정 상태에서
+            C(s) = coefficient * (exp(-ke*s) / (1 - exp(-ke*τ)) - exp(-ka*s) / (1 - exp(-ka*τ)))
+        (s: 마지막 투약 후 경과시간)이므로, 모든 투약 간격의 공통 주기 한 번만 평가하면 됩니다.
+        - peak/trough: 각 투약열의 해석적 피크·변곡점·투약 시점과 보조 격자에서의 최대/최소
+        - avg: 주기당 AUC / 주기 = Σ coefficient * (1/ke - 1/ka) / τ (정확값)
+        - max_slope: dC/dt의 해석식 (pg/mL per Day)
+        1구획 외 PK 모델 약물은 지수항 분해의 항정 상태 폐형식(pk_models.steady_state_kernel)으로 더하며,
+        peak/trough는 보조 격자와 투약·지연 시점에서 평가합니다. avg는 AUC(pk_models.kernel_auc) / τ로 정확합니다.
+        공통 주기를 구할 수 없는 불규칙 스케줄은 None을 반환하며, 이 경우 시뮬레이션을 사용해야 합니다.
+        :param pk_params: 개인별 PK 피팅 결과 (simulate_schedule 참고)
+        """
+        terms = self._get_steady_terms(schedule_list, calibration_factors, pk_params)
+        kernel_terms = self._get_steady_kernel_terms(schedule_list, calibration_factors, pk_params)
+        if not terms and not kernel_terms:
+            return {"peak": 0, "trough": 0, "avg": 0, "fluctuation": 0, "max_slope": 0}
+
+        period = self._get_common_period([term[3] for term in terms] + [term[2] for term in kernel_terms])
+        if period is None:
+            return None
+
+        t = self._get_steady_points(terms, period)
+        if kernel_terms:
+            kernel_points = [
+                (phase + tau * np.arange(int(round(period / tau))))[:, None]
+                + np.array(sorted({0.0} | {delay for _, _, delay in kernel}))[None, :]
+                for _, kernel, tau, phase in kernel_terms
+            ]
+            t = np.mod(np.concatenate([t] + [points.ravel() for points in kernel_points]), period)
+        conc, slope = self._evaluate_steady_state(terms, t, kernel_terms)
+        conc = np.maximum(conc, 0)
+
+        peak = float(np.max(conc))
+        if peak <= 0:
+            return {"peak": 0, "trough": 0, "avg": 0, "fluctuation": 0, "max_slope": 0}
+        trough = float(np.min(conc))
+        avg = float(
+            sum(coefficient * (1.0 / ke - 1.0 / ka) / tau for coefficient, ka, ke, tau, _ in terms)
+            + sum(coefficient * pk_models.kernel_auc(kernel) / tau for coefficient, kernel, tau, _ in kernel_terms)
+        )
+        fluctuation = ((peak - trough) / avg * 100) if avg > 0 else 0
+
+        return {
+            "peak": peak,
+            "trough": trough,
+            "avg": avg,
+            "fluctuation": fluctuation,
+            "max_slope": float(np.max(np.abs(slope))) * 24,
+        }
+
+    def steady_state_sensitivity(self, schedule_list, calibration_factors=None, pk_params=None) -> Optional[Dict[str, Any]]:
+        """
+        항정 상태 통계(peak/trough/avg/fluctuation)의 해석적 민감도 (유한차분 재시뮬레이션 없음)
+
+        C(t) = Σ coefficient * g(s; τ),  g(s; τ) = exp(-ke*s) / (1 - exp(-ke*τ)) - exp(-ka*s) / (1 - exp(-ka*τ))
+        - 용량/보정계수/체중: coefficient에 대한 배율이므로 해당 성분 농도 / 파라미터 값
+        - 투약 간격: ∂g/∂τ = -ke*exp(-ke*s)*exp(-ke*τ)/(1-exp(-ke*τ))² + ka*exp(-ka*s)*exp(-ka*τ)/(1-exp(-ka*τ))²
+          (마지막 투약 후 경과시간 s를 고정한 국소 미분), avg는 Σ coefficient*(1/ke - 1/ka)/τ의 정확한 미분
+        peak/trough는 포락선 정리에 따라 최대/최소 시점의 편미분을 사용합니다.
+        :param pk_params: 개인별 PK 피팅 결과 (simulate_schedule 참고) - 피팅된 ka/ke/scale 기준의 민감도
+
+        :return: 불규칙 스케줄이거나 1구획 외 PK 모델 약물이 포함되면 None, 아니면
+            {"stats": steady_state_stats 결과,
+             "items": [{"name", "dose": {통계: d/d(mg)}, "interval": {통계: d/d(일)}} 또는 None (스케줄 순서)],
+             "weight": {통계: d/d(kg)},
+             "calibration": {경로: {통계: d/d(보정계수)}}}
+        """
+        if calibration_factors is None:
+            calibration_factors = {}
+        if self._get_steady_kernel_terms(schedule_list, calibration_factors, pk_params):
+            return None
+
+        item_terms = [self._get_steady_terms([item], calibration_factors, pk_params) for item in schedule_list]
+        terms = [term for group in item_terms for term in group]
+        stats = self.steady_state_stats(schedule_list, calibration_factors, pk_params)
+        if stats is None:
+            return None
+
+        keys = ("peak", "trough", "avg", "fluctuation")
+        zero = {key: 0.0 for key in keys}
+        if not terms or stats["peak"] <= 0:
+            return {
+                "stats": stats,
+                "items": [dict(name=item['name'], dose=dict(zero), interval=dict(zero)) if group else None
+                          for item, group in zip(schedule_list, item_terms)],
+                "weight": dict(zero),
+                "calibration": {},
+            }
+
+        period = self._get_common_period([term[3] for term in terms])
+        t = self._get_steady_points(terms, period)
+        conc, _ = self._evaluate_steady_state(terms, t)
+        t_ext = np.array([t[int(np.argmax(conc))], t[int(np.argmin(conc))]])
+        peak, trough, avg = stats["peak"], stats["trough"], stats["avg"]
+
+        def _with_fluctuation(d_peak, d_trough, d_avg):
+            # F = (P - T) / A * 100
+            d_fluct = ((d_peak - d_trough) / avg - (peak - trough) * d_avg / avg ** 2) * 100 if avg > 0 else 0.0
+            return {"peak": float(d_peak), "trough": float(d_trough), "avg": float(d_avg), "fluctuation": float(d_fluct)}
+
+        def _unit_derivative(unit_group):
+            # coefficient ∝ 파라미터인 성분의 미분 = 파라미터 값 1일 때의 성분 농도
+            part_ext, _ = self._evaluate_steady_state(unit_group, t_ext)
+            part_avg = sum(c * (1.0 / ke - 1.0 / ka) / tau for c, ka, ke, tau, _ in unit_group)
+            return _with_fluctuation(part_ext[0], part_ext[1], part_avg)
+
+        items = []
+        for item, group in zip(schedule_list, item_terms):
+            if not group:
+                items.append(None)
+                continue
+            d_ext = np.zeros(2)
+            d_avg = 0.0
+            for coefficient, ka, ke, tau, phase in group:
+                since_dose = np.mod(t_ext - phase, tau)
+                keep_e = -np.expm1(-ke * tau)
+                keep_a = -np.expm1(-ka * tau)
+                dg_dtau = (
+                    -ke * np.exp(-ke * (since_dose + tau)) / keep_e ** 2
+                    + ka * np.exp(-ka * (since_dose + tau)) / keep_a ** 2
+                )
+                d_ext += coefficient * dg_dtau
+                d_avg -= coefficient * (1.0 / ke - 1.0 / ka) / tau ** 2
+            # 간격 단위 변환: h -> 일
+            items.append({
+                "name": item['name'],
+                "dose": _unit_derivative(self._get_steady_terms([{**item, 'dose': 1.0}], calibration_factors, pk_params)),
+                "interval": _with_fluctuation(d_ext[0] * 24, d_ext[1] * 24, d_avg * 24),
+            })
+
+        # 체중: coefficient ∝ 1 / (체중 × BMI 보정(체중 / 키²)) -> 모든 성분에 같은 배율
+        bmi_mod = self._get_bmi_adjustment()
+        d_bmi_mod = 0.01 if 0.9 < 1.0 + (self.bmi - 22.0) * 0.01 < 1.3 else 0.0
+        d_log_weight = -1.0 / self.weight - d_bmi_mod / (bmi_mod * (self.height / 100) ** 2)
+        weight = _with_fluctuation(peak * d_log_weight, trough * d_log_weight, avg * d_log_weight)
+
+        calibration = {}
+        for route in dict.fromkeys(data.DRUG_DB[item['name']].type for item, group in zip(schedule_list, item_terms) if group):
+            route_items = [item for item, group in zip(schedule_list, item_terms) if group and data.DRUG_DB[item['name']].type == route]
+            calibration[route] = _unit_derivative(self._get_steady_terms(route_items, {route: 1.0}, pk_params))
+
+        return {"stats": stats, "items": items, "weight": weight, "calibration": calibration}
+
+    def optimize_regimen(
+        self,
+        drug_name: str,
+        guideline: str = "WPATH_SOC8",
+        calibration_factors: Optional[Dict[str, float]] = None,
+        intervals: Optional[List[float]] = None,
+        dose_step: Optional[float] = None,
+        top_n: int = 5,
+        pk_params: Optional[Dict[str, Dict[str, float]]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        목표 농도 범위(data.GUIDELINES)를 만족하는 용량 × 투약 간격 탐색
+        항정 상태 Trough >= e2_min, Peak <= e2_max를 만족하는 처방 중 변동폭(Fluctuation)이 작은 순으로 반환합니다.
+
+        항정 상태 농도는 용량에 정비례하므로 간격마다 단위 용량(1 mg) 통계를 한 번만 계산하면
+        허용 용량 구간 [e2_min / Trough₁, e2_max / Peak₁]이 바로 구해지고, 변동폭은 용량과 무관합니다.
+        간격별로 평균 농도가 목표 범위 중앙에 가장 가까운 용량을 고릅니다.
+        :param intervals: 투약 간격 후보 (일), 생략 시 주사는 OPTIMIZER_INJECTION_INTERVALS,
+            설하는 OPTIMIZER_DAILY_SPLITS에 따른 분할 투약 (1일 1회/2회/3회), 경구·경피는 1일 1회
+        :param dose_step: 1회 용량 단위 (mg), 생략 시 OPTIMIZER_DOSE_STEPS
+        :param pk_params: 개인별 PK 피팅 결과 (simulate_schedule 참고) - 피팅된 곡선 기준으로 탐색
+        :return: [{"item": 스케줄 항목 dict, "peak", "trough", "avg", "fluctuation", "daily_dose"}, ...]
+        """
+        if drug_name not in data.DRUG_DB:
+            raise ValueError(f"Unknown drug: {drug_name}")
+        target = data.GUIDELINES.get(guideline, {})
+        if "e2_min" not in target or "e2_max" not in target:
+            raise ValueError(f"Guideline {guideline} does not define an e2_min/e2_max target range.")
+        drug_info = data.DRUG_DB[drug_name]
+        if drug_info.type not in OPTIMIZER_DOSE_STEPS:
+            raise ValueError(f"Regimen optimization supports {tuple(OPTIMIZER_DOSE_STEPS)} routes. Got {drug_info.type}")
+
+        if intervals is None:
+            if drug_info.type == "Injection":
+                intervals = OPTIMIZER_INJECTION_INTERVALS
+            elif drug_info.type == "Sublingual":
+                intervals = tuple(1.0 / n for n in OPTIMIZER_DAILY_SPLITS)
+            else:
+                intervals = (1.0,)
+        step = dose_step if dose_step is not None else OPTIMIZER_DOSE_STEPS[drug_info.type]
+        if step <= 0:
+            raise ValueError(f"dose_step must be positive, got {step}")
+
+        e2_min, e2_max = target["e2_min"], target["e2_max"]
+        e2_mid = (e2_min + e2_max) / 2
+        candidates = []
+        for interval in intervals:
+            unit = self.steady_state_stats([{"name": drug_name, "dose": 1.0, "interval": interval}], calibration_factors, pk_params)
+            if unit is None or unit["trough"] <= 0:
+                continue
+
+            dose_low = e2_min / unit["trough"]
+            dose_high = min(e2_max / unit["peak"], drug_info.max_safe_dose)
+            doses = step * np.arange(math.ceil(dose_low / step - 1e-9), math.floor(dose_high / step + 1e-9) + 1)
+            doses = doses[doses > 0]
+            if len(doses) == 0:
+                continue
+
+            dose = round(float(doses[np.argmin(np.abs(doses * unit["avg"] - e2_mid))]), 4)
+            candidates.append({
+                "item": {
+                    "name": drug_name, "type": drug_info.type, "dose": dose, "interval": interval,
+                    "is_cycling": False, "offset": 0.0, "duration": 1.0,
+                },
+                "peak": dose * unit["peak"],
+                "trough": dose * unit["trough"],
+                "avg": dose * unit["avg"],
+                "fluctuation": unit["fluctuation"],
+                "daily_dose": dose / interval,
+            })
+
+        candidates.sort(key=lambda c: (round(c["fluctuation"], 6), abs(c["avg"] - e2_mid)))
+        return candidates[:top_n]
+
+    @staticmethod
+    def _get_calibration_grid(horizon_days):
+        """
+        보정계수 산출용 고정 간격 시간 격자 (h): 간격(24 / CALIBRATION_RESOLUTION h)이 기간과 무관하므로
+        짧은 기간의 격자는 긴 기간 격자의 앞부분과 같고, 검사일별 값이 시뮬레이션 기간에 따라 달라지지 않습니다.
+        """
+        n_points = int(round(float(horizon_days) * CALIBRATION_RESOLUTION)) + 1
+        return np.arange(n_points) * (24.0 / CALIBRATION_RESOLUTION)
+
+    @staticmethod
+    def _get_calibration_horizon(max_lab_day):
+        """보정 시뮬레이션 기간: 최대 검사일 + 1일을 CALIBRATION_HORIZON_STEP_DAYS 단위로 올림 (기록 추가 시 재사용 목적)"""
+        step = CALIBRATION_HORIZON_STEP_DAYS
+        return max(int(math.ceil((float(max_lab_day) + 1) / step)) * step, step)
+
+    def _get_route_split_components(self, label_groups, target_route, horizon_days):
+        """
+        경로별 투약 그룹 -> (격자(h), 대상 경로 농도, 기타 경로 농도, 대상 경로 그룹, 기타 경로 그룹)
+        격자 밖 시각(Trough 후보)도 같은 그룹으로 평가할 수 있도록 그룹을 함께 반환합니다.
+        """
+        t_hours = self._get_calibration_grid(horizon_days)
+        target_groups = list(label_groups.get(target_route, []))
+        other_groups = [group for label, groups in label_groups.items() if label != target_route for group in groups]
+        c_target = superpose_dose_groups(t_hours, target_groups)
+        c_other = superpose_dose_groups(t_hours, other_groups)
+        for arr in (t_hours, c_target, c_other):
+            arr.flags.writeable = False
+        return t_hours, c_target, c_other, target_groups, other_groups
+
+    def _get_calibration_components(self, schedule_list, horizon_days, target_route, current_factors, pk_params=None):
+        """
+        보정계수 산출용 경로별 성분 분해 시뮬레이션 1회 (LRU 캐시, _get_route_split_components 형식)
+        대상 경로는 보정계수 1.0으로 계산하며, 같은 스케줄/프로필/기간이면 검사 기록 추가·삭제 시 재사용됩니다.
+        개인별 PK 피팅값(pk_params)이 있으면 피팅된 곡선 기준으로 보정계수를 구합니다 (피팅 배율과의 이중 보정 방지).
+        """
+        calc_factors = dict(current_factors)
+        calc_factors[target_route] = 1.0
+        key = (
+            "calibration", self._get_profile_key(), _schedule_signature(schedule_list),
+            target_route, tuple(sorted(calc_factors.items())), int(horizon_days),
+            tuple(sorted((name, tuple(sorted(p.items()))) for name, p in (pk_params or {}).items())),
+        )
+
+        def _compute():
+            label_groups = self._get_fused_groups(
+                schedule_list, horizon_days * 24, calc_factors, pk_params=pk_params, components="route"
+            )
+            return self._get_route_split_components(label_groups, target_route, horizon_days)
+
+        return _CALIBRATION_CACHE.get_or_compute(key, _compute)
+
+    @staticmethod
+    def _factors_from_components(components, lab_days, lab_values):
+        """
+        검사 기록별 보정계수: 각 검사일 Trough 윈도우에서 전체 농도가 가장 낮은 시점 기준
+        윈도우 내 격자점에 더해 윈도우 경계와 투약 시각(농도가 꺾이는 지점)을 정확히 평가하므로
+        Trough가 격자 간격에 따라 달라지지 않습니다.
+        """
+        t_hours, c_target, c_other, target_groups, other_groups = components
+        factors = np.ones(len(lab_days))
+        # [핵심] 잔류 농도(Trough) 탐색: lab_day 근처(0.5일 전 ~ 0.1일 후) 윈도우
+        lows = np.maximum(0, lab_days - 0.5) * 24
+        highs = (lab_days + 0.1) * 24
+        starts = np.searchsorted(t_hours, lows, side="left")
+        ends = np.searchsorted(t_hours, highs, side="right")
+
+        # 모든 윈도우의 격자 밖 후보 시각을 모아 한 번에 평가
+        dose_hours = np.unique(np.concatenate([np.zeros(0)] + [times for times, _, _ in target_groups + other_groups]))
+        window_extra = []
+        for low, high in zip(lows, highs):
+            inside = dose_hours[np.searchsorted(dose_hours, low, side="left"):np.searchsorted(dose_hours, high, side="right")]
+            window_extra.append(np.concatenate(([low, high], inside)))
+        query = np.unique(np.concatenate(window_extra))
+        q_target = superpose_dose_groups(query, target_groups)
+        q_other = superpose_dose_groups(query, other_groups)
+
+        for i, (lab_value, start, end, extra) in enumerate(zip(lab_values, starts, ends, window_extra)):
+            if lab_value <= 0:
+                continue
+            q_idx = np.searchsorted(query, extra)
+            cand_target = np.concatenate((c_target[start:end], q_target[q_idx]))
+            cand_other = np.concatenate((c_other[start:end], q_other[q_idx]))
+            idx = int(np.argmin(cand_target + cand_other))
+            if cand_target[idx] < 0.1:
+                continue
+            factors[i] = np.clip((lab_value - cand_other[idx]) / cand_target[idx], 0.1, 5.0)
+        return factors
+
+    def calculate_calibration_factor(self, schedule_list, lab_day, lab_value, target_route="Injection", current_factors=None, pk_params=None):
         if lab_value <= 0:
             return 1.0
         if current_factors is None:
             current_factors = {}
-        
-        calc_factors = current_factors.copy()
-        calc_factors[target_route] = 1.0
 
-        other_schedule = [d for d in schedule_list if d['name'] in data.DRUG_DB and data.DRUG_DB[d['name']].type != target_route]
-        t_sim, c_other = self.simulate_schedule(other_schedule, days=lab_day + 1, resolution=24, calibration_factors=calc_factors)
-        
-        target_schedule = [d for d in schedule_list if d['name'] in data.DRUG_DB and data.DRUG_DB[d['name']].type == target_route]
-        _, c_target = self.simulate_schedule(target_schedule, days=lab_day + 1, resolution=24, calibration_factors={target_route: 1.0})
-        
-        # [핵심] 잔류 농도(Trough) 탐색 로직 추가
-        # lab_day 근처(0.5일 전 ~ 0.1일 후)에서 전체 농도가 가장 낮은 지점을 찾습니다.
-        window_mask = (t_sim >= max(0, lab_day - 0.5)) & (t_sim <= lab_day + 0.1)
-        
-        if np.any(window_mask):
-            c_total = c_other + c_target
-            # 윈도우 내에서 가장 낮은 농도 시점의 인덱스 추출
-            trough_rel_idx = np.argmin(c_total[window_mask])
-            actual_idx = np.where(window_mask)[0][trough_rel_idx]
-            conc_other = c_other[actual_idx]
-            conc_target = c_target[actual_idx]
-        else:
-            idx = (np.abs(t_sim - lab_day)).argmin()
-            conc_other = c_other[idx]
-            conc_target = c_target[idx]
-        
-        if conc_target < 0.1:
-            return 1.0
-            
-        new_factor = (lab_value - conc_other) / conc_target
-        return np.clip(new_factor, 0.1, 5.0)
+        # 경로별 성분 분해로 1회 시뮬레이션에서 대상 경로/기타 경로 농도를 함께 얻음
+        components = self._get_calibration_components(
+            schedule_list, self._get_calibration_horizon(lab_day), target_route, current_factors, pk_params
+        )
+        factors = self._factors_from_components(components, np.array([float(lab_day)]), np.array([float(lab_value)]))
+        return factors[0]
 
-    def calculate_weighted_calibration_factor(self, schedule_list, lab_history, target_route="Injection", current_factors=None):
+    def calculate_weighted_calibration_factor(self, schedule_list, lab_history, target_route="Injection", current_factors=None, pk_params=None):
+        """
+        검사 기록 전체의 가중 평균 보정계수 (최근 기록일수록 높은 가중치)
+        최대 검사일까지 1회 시뮬레이션한 결과에서 모든 기록의 Trough 윈도우를 평가합니다.
+        :param pk_params: 개인별 PK 피팅 결과 (simulate_schedule 참고) - 화면 곡선과 같은 기준으로 보정
+        """
         if not lab_history:
             return 1.0
+        if current_factors is None:
+            current_factors = {}
 
-        factors = []
-        weights = []
+        lab_days = np.array([float(record['day']) for record in lab_history])
+        lab_values = np.array([float(record['value']) for record in lab_history])
 
-        for record in lab_history:
-            k = self.calculate_calibration_factor(schedule_list, record['day'], record['value'], target_route, current_factors)
-            factors.append(k)
-            weights.append(np.exp(record['day'] / 14.0))
+        components = self._get_calibration_components(
+            schedule_list, self._get_calibration_horizon(lab_days.max()), target_route, current_factors, pk_params
+        )
+        factors = self._factors_from_components(components, lab_days, lab_values)
+        weights = np.exp(lab_days / 14.0)
 
-        if not factors:
+        return np.average(factors, weights=weights)
+
+    def calculate_event_calibration_factor(self, events, lab_history, target_route="Injection", current_factors=None, pk_params=None):
+        """
+        실제 투약 기록(simulate_events 형식) 기준 가중 평균 보정계수
+        이상적인 스케줄 대신 누락/지연/용량 변경이 반영된 실제 투약으로 검사 기록을 비교합니다.
+        """
+        if not lab_history:
             return 1.0
+        if current_factors is None:
+            current_factors = {}
+
+        lab_days = np.array([float(record['day']) for record in lab_history])
+        lab_values = np.array([float(record['value']) for record in lab_history])
+
+        calc_factors = dict(current_factors)
+        calc_factors[target_route] = 1.0
+        label_groups = self._get_event_groups(events, calc_factors, pk_params, components="route")
+        components = self._get_route_split_components(
+            label_groups, target_route, self._get_calibration_horizon(lab_days.max())
+        )
+        factors = self._factors_from_components(components, lab_days, lab_values)
+        weights = np.exp(lab_days / 14.0)
 
         return np.average(factors, weights=weights)
 
+    @staticmethod
+    def _flatten_lab_history(lab_history):
+        """검사 기록 평탄화: {경로: [기록]} 또는 [기록] -> (검사일 배열, 측정값 배열), 중복 기록은 1회만 사용"""
+        if isinstance(lab_history, dict):
+            records = [record for route_records in lab_history.values() for record in route_records]
+        else:
+            records = list(lab_history or [])
+        unique = sorted({(float(r['day']), float(r['value'])) for r in records if float(r['value']) > 0})
+        days = np.array([day for day, _ in unique])
+        values = np.array([value for _, value in unique])
+        return days, values
+
+    def fit_pk_parameters(self, schedule_list, lab_history, calibration_factors=None, max_iter=FIT_MAX_ITER) -> Dict[str, Any]:
+        """
+        검사 기록 기반 개인별 PK 파라미터 MAP(최대 사후확률) 추정
+        약물별 ka, ke, 농도 배율(scale, 분포용적/생체이용률 개인차)을 로그 척도에서 추정합니다.
+        - 사전분포: DrugInfo의 반감기/Tmax에서 구한 ka, ke와 scale=1을 중심으로 한 로그정규분포 (FIT_PRIOR_SIGMA)
+        - 측정 오차: 가산 + 비례 오차 모델 (FIT_ERROR_ADDITIVE, FIT_ERROR_PROPORTIONAL)
+        검사 시각의 예측 농도와 야코비안을 Bateman 합의 해석적 미분으로 (검사 수 × 투약 수) 배열에서 한 번에 계산하고
+        Levenberg-Marquardt 반복으로 최소화합니다. 현재 보정계수(calibration_factors)는 반영된 상태에서 추정합니다.
+        :param lab_history: {경로: [{"day", "value"}, ...]} (세션 형식) 또는 기록 리스트
+        :return: {"params": {약물명: {"ka", "ke", "scale"}}, "rmse_before", "rmse_after",
+                  "n_labs", "iterations", "converged"}
+        """
+        if calibration_factors is None:
+            calibration_factors = {}
+        lab_days, lab_values = self._flatten_lab_history(lab_history)
+        if len(lab_days) < FIT_MIN_LABS:
+            raise ValueError(f"At least {FIT_MIN_LABS} lab records are required for PK fitting. Got {len(lab_days)}")
+
+        lab_hours = lab_days * 24
+        horizon_hours = float(lab_hours.max()) + 1.0
+        sigma_y = np.sqrt(FIT_ERROR_ADDITIVE ** 2 + (FIT_ERROR_PROPORTIONAL * lab_values) ** 2)
+
+        # 1. 약물별 파라미터 인덱스와 항목별 (약물 인덱스, ka/ke 무관 계수, 검사 시각 - 투약 시각 행렬)
+        drug_names: List[str] = []
+        parts = []
+        for item in schedule_list:
+            if float(item['interval']) < 0.01 or item['name'] not in data.DRUG_DB:
+                continue
+            drug_info = data.DRUG_DB[item['name']]
+            self._require_default_model(drug_info, "fit_pk_parameters")
+            if item['name'] not in drug_names:
+                drug_names.append(item['name'])
+            # ka/(ka-ke)를 제외한 Bateman 계수 (환자 보정 반영 용량/분포용적 × 보정계수)
+            effective_dose_ng, volume = self._get_effective_dose_and_volume(
+                item['dose'], drug_info.bioavailability, drug_info.ester_factor, drug_info.type
+            )
+            base = effective_dose_ng / volume * calibration_factors.get(drug_info.type, 1.0)
+            dose_times = np.asarray(self._get_dose_times(item, horizon_hours), dtype=float)
+            elapsed = lab_hours[:, None] - dose_times[None, :]
+            valid = elapsed >= 0
+            parts.append((drug_names.index(item['name']), base, np.where(valid, elapsed, 0.0), valid))
+
+        if not drug_names:
+            raise ValueError("The schedule has no drugs that can be fitted.")
+
+        theta_prior = np.concatenate([
+            [np.log(ka), np.log(ke), 0.0]
+            for ka, ke in (self._get_ka_ke(data.DRUG_DB[name]) for name in drug_names)
+        ])
+        sigma_prior = np.tile([FIT_PRIOR_SIGMA["ka"], FIT_PRIOR_SIGMA["ke"], FIT_PRIOR_SIGMA["scale"]], len(drug_names))
+
+        def _predict(theta):
+            # 예측 농도와 로그 파라미터에 대한 야코비안 (검사 수 × 파라미터 수)
+            pred = np.zeros(len(lab_hours))
+            jac = np.zeros((len(lab_hours), len(theta)))
+            for drug_idx, base, elapsed, valid in parts:
+                ka, ke, scale = np.exp(theta[3 * drug_idx:3 * drug_idx + 3])
+                exp_e = np.where(valid, np.exp(-ke * elapsed), 0.0)
+                exp_a = np.where(valid, np.exp(-ka * elapsed), 0.0)
+                sum_e, sum_a = exp_e.sum(axis=1), exp_a.sum(axis=1)
+                moment_e, moment_a = (elapsed * exp_e).sum(axis=1), (elapsed * exp_a).sum(axis=1)
+
+                diff = ka - ke
+                amplitude = base * scale
+                conc = amplitude * ka / diff * (sum_e - sum_a)
+                pred += conc
+                jac[:, 3 * drug_idx] += ka * amplitude * (-ke / diff ** 2 * (sum_e - sum_a) + ka / diff * moment_a)
+                jac[:, 3 * drug_idx + 1] += ke * amplitude * (ka / diff ** 2 * (sum_e - sum_a) - ka / diff * moment_e)
+                jac[:, 3 * drug_idx + 2] += conc
+            return pred, jac
+
+        def _residual(theta):
+            pred, jac = _predict(theta)
+            r = np.concatenate(((pred - lab_values) / sigma_y, (theta - theta_prior) / sigma_prior))
+            J = np.vstack((jac / sigma_y[:, None], np.diag(1.0 / sigma_prior)))
+            return r, J, pred
+
+        def _is_valid(theta):
+            # 흡수가 소실보다 빨라야 함 (ka > ke, Bateman 계수 특이점 방지)
+            log_ka, log_ke = theta[0::3], theta[1::3]
+            return bool(np.all(log_ka - log_ke > np.log(1.01)))
+
+        # 2. Levenberg-Marquardt
+        theta = theta_prior.copy()
+        r, J, pred_before = _residual(theta)
+        cost = float(r @ r)
+        damping = 1e-2
+        converged = False
+        iterations = 0
+        for iterations in range(1, max_iter + 1):
+            A = J.T @ J
+            g = J.T @ r
+            step = np.linalg.solve(A + damping * np.diag(np.diag(A)), -g)
+            candidate = theta + step
+            if _is_valid(candidate):
+                r_new, J_new, _ = _residual(candidate)
+                cost_new = float(r_new @ r_new)
+            else:
+                cost_new = np.inf
+            if cost_new < cost:
+                improvement = cost - cost_new
+                theta, r, J, cost = candidate, r_new, J_new, cost_new
+                damping = max(damping / 3, 1e-9)
+                if np.max(np.abs(step)) < 1e-6 or improvement < 1e-10 * max(cost, 1.0):
+                    converged = True
+                    break
+            else:
+                damping *= 4
+                if damping > 1e8:
+                    converged = True
+                    break
+
+        pred_after, _ = _predict(theta)
+        params = {}
+        for idx, name in enumerate(drug_names):
+            ka, ke, scale = np.exp(theta[3 * idx:3 * idx + 3])
+            params[name] = {"ka": float(ka), "ke": float(ke), "scale": float(scale)}
+
+        return {
+            "params": params,
+            "rmse_before": float(np.sqrt(np.mean((pred_before - lab_values) ** 2))),
+            "rmse_after": float(np.sqrt(np.mean((pred_after - lab_values) ** 2))),
+            "n_labs": int(len(lab_days)),
+            "iterations": iterations,
+            "converged": converged,
+        }
+
+def _item_signature(item):
+    """스케줄 항목 동일성 판별용 키 (시뮬레이션에 영향을 주는 필드만 사용)"""
+    return (
+        item['name'], float(item['dose']), float(item['interval']),
+        bool(item.get('is_cycling', False)), float(item.get('offset', 0.0)), float(item.get('duration', 1.0))
+    )
+
+def _schedule_signature(schedule_list):
+    """스케줄 동일성 판별용 키"""
+    return tuple(_item_signature(item) for item in schedule_list)
+
+class IncrementalSimulator:
+    """
+    스케줄 항목 단위 증분 시뮬레이션
+    항목 id별 성분 곡선을 보관하여, 약물 1개 추가/삭제/수정 시
+    전체 재계산 대신 해당 성분만 총 농도에 더하거나 뺍니다.
+    (프로필/기간/보정계수/PK 피팅값/병용 구간이 바뀌면 새 인스턴스를 만들어야 합니다.)
+    """
+
+    def __init__(
+        self,
+        analyzer: HormoneAnalyzer,
+        days: int = 30,
+        resolution: int = 100,
+        calibration_factors: Optional[Dict[str, float]] = None,
+        stop_day: Optional[int] = None,
+        resume_day: Optional[int] = None,
+        method: str = "closed_form",
+        pk_params: Optional[Dict[str, Dict[str, float]]] = None,
+        pauses: Optional[List[Tuple[float, Optional[float]]]] = None,
+        interactions: Optional[List[Tuple[float, Optional[float], str]]] = None
+    ):
+        if method not in SIMULATION_METHODS:
+            raise ValueError(f"Unknown simulation method: {method}. Expected one of {SIMULATION_METHODS}")
+        self.analyzer = analyzer
+        self.calibration_factors = dict(calibration_factors or {})
+        self.pk_params = dict(pk_params or {})
+        self.stop_day = stop_day
+        self.resume_day = resume_day
+        self.pauses = _normalize_pauses(pauses)
+        self.interactions = _normalize_interactions(interactions)
+        self.method = method
+
+        self.total_hours = days * 24
+        self.t_hours = np.linspace(0, self.total_hours, int(days * resolution))
+        self.total_conc = np.zeros_like(self.t_hours)
+        self._grid_key = analyzer._get_grid_key(self.t_hours, self.total_hours)
+        # 항목 키 -> (항목 시그니처, 성분 곡선)
+        self._components: Dict[str, Tuple[Tuple, Optional[np.ndarray]]] = {}
+
+    @staticmethod
+    def _item_keys(schedule_list):
+        """
+        항목 키 목록 생성: id 기준 (id가 없으면 항목 내용 기준)
+        같은 초에 추가되어 id가 겹치는 항목은 등장 순서로 구분합니다.
+        """
+        seen: Dict[str, int] = {}
+        keys = []
+        for item in schedule_list:
+            base = str(item['id']) if 'id' in item else repr(_item_signature(item))
+            n = seen.get(base, 0)
+            seen[base] = n + 1
+            keys.append(f"{base}#{n}")
+        return keys
+
+    def add_item(self, key: str, item: Dict[str, Any]):
+        """항목 성분을 계산하여 총 농도에 더함"""
+        component = self.analyzer._simulate_item(
+            item, self.t_hours, self.total_hours, self.calibration_factors,
+            self.stop_day, self.resume_day, self.method, self._grid_key, self.pk_params, self.pauses, self.interactions
+        )
+        if component is not None:
+            self.total_conc += component
+        self._components[key] = (_item_signature(item), component)
+
+    def remove_item(self, key: str):
+        """항목 성분을 총 농도에서 뺌"""
+        _, component = self._components.pop(key)
+        if component is not None:
+            self.total_conc -= component
+
+    def update(self, schedule_list: List[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        새 스케줄과 보관 중인 성분을 비교하여 바뀐 항목만 반영
+        :return: (t_days, total_conc) - simulate_schedule과 동일한 형식
+        """
+        current = dict(zip(self._item_keys(schedule_list), schedule_list))
+
+        for key in [k for k in self._components if k not in current]:
+            self.remove_item(key)
+
+        for key, item in current.items():
+            if key in self._components:
+                if self._components[key][0] == _item_signature(item):
+                    continue
+                self.remove_item(key)
+            self.add_item(key, item)
+
+        # 반복된 덧셈/뺄셈의 반올림 오차로 인한 음수 방지
+        return self.t_hours / 24, np.maximum(self.total_conc, 0)
+
+def _normalize_cohort_inputs(profiles, schedules, calibration_factors):
+    """공용/환자별 스케줄과 보정계수를 환자 수 길이의 리스트로 정규화"""
+    n_patients = len(profiles)
+    if schedules and isinstance(schedules[0], dict):
+        schedules = [schedules] * n_patients
+    elif not schedules:
+        schedules = [[]] * n_patients
+    if len(schedules) != n_patients:
+        raise ValueError(f"schedules must match profiles in length. Got {len(schedules)} and {n_patients}")
+
+    if calibration_factors is None or isinstance(calibration_factors, dict):
+        calibration_factors = [calibration_factors or {}] * n_patients
+    elif len(calibration_factors) != n_patients:
+        raise ValueError(f"calibration_factors must match profiles in length. Got {len(calibration_factors)} and {n_patients}")
+    return schedules, calibration_factors
+
+def simulate_many(
+    profiles: List[Dict[str, Any]],
+    schedules: List[Any],
+    days: int = 30,
+    resolution: int = 100,
+    calibration_factors: Optional[Any] = None,
+    stop_day: Optional[int] = None,
+    resume_day: Optional[int] = None,
+    pauses: Optional[List[Tuple[float, Optional[float]]]] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    다중 환자 일괄 시뮬레이션 (EMR 코호트 스크리닝용)
+    :param profiles: 환자 프로필 리스트 (user_profile 형식: weight, age, ast, alt, body_fat, height)
+    :param schedules: 모든 환자 공용 스케줄 1개, 또는 환자별 스케줄 리스트
+    :param calibration_factors: 공용 보정계수 dict, 또는 환자별 dict 리스트
+    :return: (t_days, conc) - conc의 shape은 (환자 수, 시간 격자점 수)
+
+    환자 보정(Vd, 체지방, BMI, First-pass, 간 기능)은 투여 경로별 스칼라 배수이므로,
+    같은 스케줄을 공유하는 환자군은 경로별 단위 곡선을 한 번만 계산한 뒤
+    (환자 × 경로) 계수 행렬과의 행렬곱으로 결과를 얻습니다.
+    """
+    n_patients = len(profiles)
+    schedules, calibration_factors = _normalize_cohort_inputs(profiles, schedules, calibration_factors)
+
+    total_hours = days * 24
+    num_points = int(days * resolution)
+    t_hours = np.linspace(0, total_hours, num_points)
+    conc = np.zeros((n_patients, num_points))
+
+    if n_patients == 0:
+        return t_hours / 24, conc
+
+    # 1. 환자별 보정 계수를 벡터로 구성 (HormoneAnalyzer.__init__과 동일한 하한 적용)
+    weight = np.array([max(float(p.get('weight', 60.0)), 30.0) for p in profiles])
+    height = np.array([max(float(p.get('height', 170.0)), 100.0) for p in profiles])
+    age = np.array([int(p.get('age', 25)) for p in profiles])
+    ast = np.array([float(p.get('ast', 20.0)) for p in profiles])
+    alt = np.array([float(p.get('alt', 20.0)) for p in profiles])
+    body_fat = np.array([float(p.get('body_fat', 22.0)) for p in profiles])
+    bmi = weight / ((height / 100) ** 2)
+
+    # 경로 공통 배수: 1 / (체중 × 체지방 보정 × BMI 보정) × 간 기능 보정
+    patient_mod = _liver_metabolism_factor(ast, alt) / (weight * _body_fat_adjustment(body_fat) * _bmi_adjustment(bmi))
+
+    # 2. 동일 스케줄 환자군별로 경로별 단위 곡선 계산
+    worker = HormoneAnalyzer()
+    groups: Dict[Tuple, List[int]] = {}
+    for idx, schedule_list in enumerate(schedules):
+        groups.setdefault(_schedule_signature(schedule_list), []).append(idx)
+
+    for idx_list in groups.values():
+        route_curves = worker._simulate_route_curves(schedules[idx_list[0]], t_hours, total_hours, stop_day, resume_day, pauses)
+        if not route_curves:
+            continue
+
+        routes = list(route_curves.keys())
+        rows = np.array(idx_list)
+
+        # (환자 × 경로) 계수 행렬
+        route_matrix = np.empty((len(rows), len(routes)))
+        for j, route_type in enumerate(routes):
+            cf = np.array([calibration_factors[i].get(route_type, 1.0) for i in idx_list])
+            fp = _first_pass_adjustment(age[rows], route_type)
+            route_matrix[:, j] = patient_mod[rows] * fp * cf / worker.ROUTE_CONSTANTS.get(route_type, 4.0)
+
+        conc[rows] = route_matrix @ np.vstack([route_curves[r] for r in routes])
+
+    return t_hours / 24, conc
+
+# -----------------------------------------------------------------------------
+# 프로세스 풀 병렬 실행 (야간 배치/대규모 Monte Carlo용)
+# 결과는 부모 프로세스가 만든 공유 메모리 블록에 워커가 직접 기록하므로 배열 피클링이 없습니다.
+# -----------------------------------------------------------------------------
+def _analyzer_from_profile(profile: Dict[str, Any]) -> HormoneAnalyzer:
+    """user_profile 형식의 dict로 HormoneAnalyzer 생성"""
+    return HormoneAnalyzer(
+        user_weight=profile.get('weight', 60.0),
+        user_age=profile.get('age', 25),
+        ast=profile.get('ast', 20.0),
+        alt=profile.get('alt', 20.0),
+        body_fat=profile.get('body_fat', 22.0),
+        user_height=profile.get('height', 170.0)
+    )
+
+def _cohort_shard_worker(shm_name, shape, start, profiles, schedules, calibration_factors, sim_kwargs):
+    """환자 샤드 시뮬레이션: 결과 행을 공유 메모리의 [start, start + 환자 수) 구간에 기록"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        out = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        for offset, (profile, schedule_list, factors) in enumerate(zip(profiles, schedules, calibration_factors)):
+            _, conc = _analyzer_from_profile(profile).simulate_schedule(
+                schedule_list, calibration_factors=factors, **sim_kwargs
+            )
+            out[start + offset] = conc
+        del out
+    finally:
+        shm.close()
+    return len(profiles)
+
+def _monte_carlo_shard_worker(shm_name, shape, start, count, profile, schedule_list, sim_kwargs, seed):
+    """Monte Carlo 샘플 샤드: 가상 환자 곡선을 공유 메모리의 [start, start + count) 구간에 기록"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        out = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        _analyzer_from_profile(profile).simulate_monte_carlo_samples(
+            schedule_list, count, seed=seed, out=out[start:start + count], **sim_kwargs
+        )
+        del out
+    finally:
+        shm.close()
+    return count
+
+def _resolve_parallel_shards(n_items, max_workers, shard_size):
+    """워커 수/샤드 크기 결정 -> (워커 수, [(시작, 개수), ...])"""
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    if max_workers < 1:
+        raise ValueError(f"max_workers must be at least 1, got {max_workers}")
+    if shard_size is None:
+        shard_size = PARALLEL_SHARD_SIZE
+    if shard_size < 1:
+        raise ValueError(f"shard_size must be at least 1, got {shard_size}")
+    shards = [(start, min(shard_size, n_items - start)) for start in range(0, n_items, shard_size)]
+    return max_workers, shards
+
+def _run_shards(worker, shape, shard_args, max_workers):
+    """
+    공유 메모리 블록을 할당해 샤드별 worker(shm_name, shape, *args)를 실행하고 결과 배열을 반환
+    max_workers가 1이거나 샤드가 1개면 프로세스를 띄우지 않고 현재 프로세스에서 실행합니다.
+    """
+    nbytes = max(int(np.prod(shape)) * np.dtype(np.float64).itemsize, 1)
+    shm = shared_memory.SharedMemory(create=True, size=nbytes)
+    try:
+        if max_workers == 1 or len(shard_args) <= 1:
+            for args in shard_args:
+                worker(shm.name, shape, *args)
+        else:
+            with ProcessPoolExecutor(max_workers=min(max_workers, len(shard_args))) as executor:
+                futures = [executor.submit(worker, shm.name, shape, *args) for args in shard_args]
+                for future in futures:
+                    future.result()
+        view = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        result = view.copy()
+        del view
+    finally:
+        shm.close()
+        shm.unlink()
+    return result
+
+def simulate_cohort_parallel(
+    profiles: List[Dict[str, Any]],
+    schedules: List[Any],
+    days: int = 30,
+    resolution: int = 100,
+    calibration_factors: Optional[Any] = None,
+    stop_day: Optional[int] = None,
+    resume_day: Optional[int] = None,
+    method: str = "closed_form",
+    max_workers: Optional[int] = None,
+    shard_size: Optional[int] = None,
+    pauses: Optional[List[Tuple[float, Optional[float]]]] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    다중 환자 시뮬레이션의 프로세스 풀 버전 (환자 단위 샤딩)
+    입력 형식은 simulate_many와 같고, 환자마다 HormoneAnalyzer.simulate_schedule을 실행합니다.
+    :param max_workers: 워커 프로세스 수 (기본값: CPU 코어 수, 1이면 현재 프로세스에서 실행)
+    :param shard_size: 워커 1회 작업당 환자 수 (기본값: PARALLEL_SHARD_SIZE)
+    :return: (t_days, conc) - conc의 shape은 (환자 수, 시간 격자점 수)
+    """
+    if method not in SIMULATION_METHODS:
+        raise ValueError(f"Unknown simulation method: {method}. Expected one of {SIMULATION_METHODS}")
+    schedules, calibration_factors = _normalize_cohort_inputs(profiles, schedules, calibration_factors)
+
+    num_points = int(days * resolution)
+    t_days = np.linspace(0, days * 24, num_points) / 24
+    n_patients = len(profiles)
+    if n_patients == 0:
+        return t_days, np.zeros((0, num_points))
+
+    max_workers, shards = _resolve_parallel_shards(n_patients, max_workers, shard_size)
+    sim_kwargs = {
+        "days": days, "resolution": resolution, "stop_day": stop_day, "resume_day": resume_day,
+        "method": method, "pauses": _normalize_pauses(pauses),
+    }
+    shard_args = [
+        (start, profiles[start:start + count], schedules[start:start + count],
+         calibration_factors[start:start + count], sim_kwargs)
+        for start, count in shards
+    ]
+    conc = _run_shards(_cohort_shard_worker, (n_patients, num_points), shard_args, max_workers)
+    return t_days, conc
+
+def simulate_monte_carlo_parallel(
+    profile: Dict[str, Any],
+    schedule_list: List[Dict[str, Any]],
+    n_samples: int = 10000,
+    days: int = 30,
+    resolution: int = 24,
+    calibration_factors: Optional[Dict[str, float]] = None,
+    stop_day: Optional[int] = None,
+    resume_day: Optional[int] = None,
+    variability: Optional[Dict[str, float]] = None,
+    percentiles: Tuple[float, ...] = MONTE_CARLO_PERCENTILES,
+    seed: Optional[int] = None,
+    max_workers: Optional[int] = None,
+    shard_size: Optional[int] = None,
+    pauses: Optional[List[Tuple[float, Optional[float]]]] = None,
+    pk_params: Optional[Dict[str, Dict[str, float]]] = None
+) -> Tuple[np.ndarray, Dict[str, Any]]:
+    """
+    HormoneAnalyzer.simulate_monte_carlo의 프로세스 풀 버전 (가상 환자 샘플 단위 샤딩)
+    샤드마다 SeedSequence.spawn으로 분리한 독립 난수열을 사용하므로 같은 seed/샤드 크기면 결과가 재현됩니다.
+    샤드 구성은 워커 수와 무관하므로 max_workers가 달라도 같은 결과를 얻습니다.
+    :param shard_size: 워커 1회 작업당 샘플 수 (기본값: PARALLEL_SHARD_SIZE)
+    :return: (t_days, {"percentiles": 백분위 튜플, "bands": (백분위 수 × 시간) 배열})
+    """
+    if n_samples < 1:
+        raise ValueError(f"n_samples must be at least 1, got {n_samples}")
+
+    num_points = int(days * resolution)
+    max_workers, shards = _resolve_parallel_shards(n_samples, max_workers, shard_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(shards))
+    sim_kwargs = {
+        "days": days, "resolution": resolution, "calibration_factors": calibration_factors,
+        "stop_day": stop_day, "resume_day": resume_day, "variability": variability,
+        "pauses": _normalize_pauses(pauses), "pk_params": pk_params,
+    }
+    shard_args = [
+        (start, count, profile, schedule_list, sim_kwargs, shard_seed)
+        for (start, count), shard_seed in zip(shards, seeds)
+    ]
+    curves = _run_shards(_monte_carlo_shard_worker, (n_samples, num_points), shard_args, max_workers)
+
+    t_days = np.linspace(0, days * 24, num_points) / 24
+    bands = np.percentile(curves, percentiles, axis=0)
+    return t_days, {"percentiles": tuple(percentiles), "bands": bands}
+
 # 단위 변환 유틸리티
 def convert_pg_to_pmol(pg_ml):
     return pg_ml * 3.671
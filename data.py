@@ -23,6 +23,8 @@ class DrugInfo:
     desc: str
     desc_en: Optional[str] = None
     metabolism: Optional[str] = None
+    pk_model: Optional[str] = None                      # pk_models 레지스트리 모델명 (생략 시 경로별 기본 모델)
+    model_params: Optional[Dict[str, float]] = None     # 모델별 추가 파라미터 (예: 패치 부착 시간 wear_hours)
 
     def __post_init__(self):
         if not (0 <= self.bioavailability <= 1.0):
@@ -354,3 +356,21 @@ INTERACTION_DB = {
 
 def get_interaction_list():
     return list(INTERACTION_DB.keys())
+
+# -----------------------------------------------------------------------------
+# 6. Testosterone Suppression (PD)
+# -----------------------------------------------------------------------------
+# 간접 반응(Indirect Response) 모델: dT/dt = k_out * (baseline * (1 - I(t)) - T)
+# 억제 분석물별 Emax 모델 I_k = Imax * C^n / (IC50^n + C^n), 독립 작용 결합 I = 1 - Π(1 - I_k)
+# (임상 관찰 범위에 맞춘 모식적 추정치: E2 200 pg/mL 이상 단독 요법, CPA 6.25~12.5 mg/일 단독 또는 E2 병용, GnRH 병용 시 T 50 ng/dL 미만)
+TESTOSTERONE_PD = {
+    "baseline": 500.0,              # ng/dL, 치료 전 총 테스토스테론
+    "turnover_half_life": 48.0,     # h, 노출 변화 후 새 평형에 도달하는 속도 (LH 분비 변화 + T 소실)
+    "drivers": {
+        # 분석물: (Imax, IC50 (pg/mL), Hill 계수) - 스피로노락톤은 수용체 차단제이므로 T 수치 억제 없음
+        "E2": (0.97, 110.0, 4.0),
+        "Cyproterone Acetate (Androcur)": (0.97, 5000.0, 1.0),
+        "Leuprorelin (Lupron Depot - 1M)": (0.97, 30.0, 2.0),
+        "Triptorelin (Decapeptyl - 1M)": (0.97, 30.0, 2.0),
+    },
+}
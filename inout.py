@@ -93,6 +93,7 @@ class DataManager:
         "drug_schedule_b",
         "compare_mode",
         "calibration_factors",
+        "pk_params",
         "lab_history",
         "surgery_mode",
         "stop_day",
@@ -126,6 +127,7 @@ class DataManager:
         "drug_schedule_b": list,
         "compare_mode": bool,
         "calibration_factors": dict,
+        "pk_params": dict,
         "lab_history": dict,
         "surgery_mode": bool,
         "stop_day": int,
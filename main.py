@@ -162,6 +162,8 @@ if 'calibration_factors' not in st.session_state:
     }
 if 'lab_history' not in st.session_state:
     st.session_state.lab_history = {} # 구조: { "Injection": [{"day": 14, "value": 150}, ...], ... }
+if 'pk_params' not in st.session_state:
+    st.session_state.pk_params = {} # 개인별 PK 피팅 결과 { 약물명: {"ka", "ke", "scale"} }
 if 'surgery_mode' not in st.session_state:
     st.session_state.surgery_mode = False
 if 'stop_day' not in st.session_state:
@@ -569,21 +571,36 @@ with tabs["surg"]:
         st.subheader(utils.t("surg_analysis_title"))
         
         # 분석을 위한 시뮬레이션 재실행 (현재 설정 기준)
-        t_surg, y_surg = analyzer.simulate_schedule(
+        # 수술 전 중단 기준은 E2이므로 항안드로겐 등 비에스트로겐 약물은 합산하지 않음
+        t_surg, surg_analytes = analyzer.simulate_analytes(
             st.session_state.drug_schedule, 
             days=int(st.session_state.surg_sim_duration),
             calibration_factors=st.session_state.calibration_factors,
             stop_day=st.session_state.stop_day,
-            resume_day=st.session_state.resume_day
+            resume_day=st.session_state.resume_day,
+            method="closed_form",
+            pk_params=st.session_state.pk_params
         )
+        y_surg = surg_analytes.get("E2", np.zeros_like(t_surg))
         
-        # 안전 기준선 설정 (pg/mL 기준)
-        s_threshold = 50.0
-        after_stop_mask = t_surg >= st.session_state.stop_day
-        safe_points = (y_surg <= s_threshold) & after_stop_mask
+        # 안전 기준선 도달일: 중단 후 곡선(지수함수의 합)의 근을 격자 없이 정확히 계산 (E2 제형만)
+        e2_surg_schedule = [
+            d for d in st.session_state.drug_schedule
+            if d['name'] in data.DRUG_DB and data.DRUG_DB[d['name']].type in analysis.ESTROGEN_ROUTES
+        ]
+        surg_solver_args = dict(
+            calibration_factors=st.session_state.calibration_factors,
+            stop_day=st.session_state.stop_day,
+            resume_day=st.session_state.resume_day,
+            pk_params=st.session_state.pk_params,
+            max_days=int(st.session_state.surg_sim_duration),
+        )
+        s_threshold = data.GUIDELINES["SURGERY_SAFETY"]["e2_max"]
+        safe_day = analyzer.time_to_threshold(
+            e2_surg_schedule, s_threshold, st.session_state.stop_day, direction="below", **surg_solver_args
+        )
         
-        if any(safe_points):
-            safe_day = t_surg[safe_points][0]
+        if safe_day is not None:
             safe_date = datetime.combine(st.session_state.start_date, datetime.min.time()) + timedelta(days=float(safe_day))
             days_to_wait = safe_day - st.session_state.stop_day
             
@@ -601,6 +618,19 @@ with tabs["surg"]:
         # 재개 가이드라인
         st.info(utils.t("resume_guide").format(surg_name=utils.t(selected_surg), weeks=display_cessation))
 
+        # 재개 후 목표 수치 회복일
+        resume_target = data.GUIDELINES["WPATH_SOC8"]["e2_min"]
+        recovery_day = analyzer.time_to_threshold(
+            e2_surg_schedule, resume_target, st.session_state.resume_day, direction="above", **surg_solver_args
+        )
+        if recovery_day is not None:
+            recovery_date = datetime.combine(st.session_state.start_date, datetime.min.time()) + timedelta(days=float(recovery_day))
+            st.write(utils.t("resume_target_msg").format(
+                days=recovery_day - st.session_state.resume_day,
+                target=resume_target,
+                date=recovery_date.strftime('%Y-%m-%d')
+            ))
+
         # [추가 기능] 수술 계획 시각화 그래프
         st.markdown("---")
         st.markdown(f"#### 📉 {utils.t('graph_title')} ({utils.t('surg_title')})")
@@ -694,13 +724,16 @@ with tabs["rep"]:
                         }
 
                         surg_days = int(st.session_state.get("surg_sim_duration", 90))
-                        t_surg_pdf, y_surg_pdf = analyzer.simulate_schedule(
+                        t_surg_pdf, surg_analytes_pdf = analyzer.simulate_analytes(
                             st.session_state.drug_schedule,
                             days=surg_days,
                             calibration_factors=st.session_state.calibration_factors,
                             stop_day=st.session_state.stop_day,
                             resume_day=st.session_state.resume_day,
+                            method="closed_form",
+                            pk_params=st.session_state.pk_params,
                         )
+                        y_surg_pdf = surg_analytes_pdf.get("E2", np.zeros_like(t_surg_pdf))
                         surg_unit_choice = st.session_state.get("surg_unit_choice", "pg/mL")
                         if surg_unit_choice == "pmol/L":
                             y_surg_pdf = utils.convert_e2_unit(y_surg_pdf, "pmol/L")
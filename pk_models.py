@@ -0,0 +1,196 @@
+"""
+EstroFrame PK Model Registry
+- 투여 경로/제형별 약동학 모델을 '지수항 임펄스 응답'으로 정의합니다.
+- 단위 용량/분포용적당 임펄스 응답: h(t) = Σ amplitude * exp(-rate * (t - delay)),  t >= delay
+- analysis.HormoneAnalyzer는 이 지수항 분해만으로 중첩(loop/closed_form/fft)과 항정 상태를 계산하므로,
+  새 모델은 kernel_terms만 구현하여 register_pk_model로 등록하면 엔진 수정 없이 사용할 수 있습니다.
+"""
+
+import numpy as np
+from typing import List, Dict, Tuple, Optional
+
+# 지수항 분해: [(amplitude, rate(1/h), delay(h)), ...]
+KernelTerms = List[Tuple[float, float, float]]
+
+# 모델 필드(DrugInfo.pk_model)가 없을 때 사용할 기본 모델
+DEFAULT_PK_MODEL = "one_compartment"
+
+# 투여 경로별 기본 모델 (미등록 경로는 DEFAULT_PK_MODEL)
+ROUTE_DEFAULT_MODELS: Dict[str, str] = {}
+
+
+class PKModel:
+    """
+    약동학 모델 기본 클래스
+    kernel_terms(ka, ke, params)가 단위 용량/분포용적당 임펄스 응답의 지수항 분해를 반환해야 합니다.
+    rate가 0인 항(계단 함수)은 진폭의 합이 0이어야 합니다 (유한한 AUC 보장).
+    근거 있는 기본값이 없는 파라미터는 required_params로 선언하여 DrugInfo.model_params에서 반드시 지정하게 합니다.
+    """
+    name = ""
+    default_params: Dict[str, float] = {}
+    required_params: Tuple[str, ...] = ()
+
+    def resolve_params(self, params: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+        """기본값과 병합한 모델 파라미터 (알 수 없거나 누락된 필수 파라미터는 ValueError)"""
+        allowed = tuple(self.default_params) + tuple(self.required_params)
+        resolved = dict(self.default_params)
+        if params:
+            unknown = set(params) - set(allowed)
+            if unknown:
+                raise ValueError(f"Unknown parameters for PK model {self.name}: {sorted(unknown)}. Expected some of {allowed}")
+            resolved.update({key: float(value) for key, value in params.items()})
+        missing = [key for key in self.required_params if key not in resolved]
+        if missing:
+            raise ValueError(f"PK model {self.name} requires model_params {missing}.")
+        return resolved
+
+    def kernel_terms(self, ka: float, ke: float, params: Dict[str, float]) -> KernelTerms:
+        raise NotImplementedError
+
+    def impulse_response(self, t, ka, ke, params=None):
+        """단위 용량/분포용적당 농도 곡선 h(t) (t: 투여 후 경과시간(h) 배열)"""
+        return evaluate_kernel(self.kernel_terms(ka, ke, self.resolve_params(params)), t)
+
+
+class OneCompartmentModel(PKModel):
+    """1구획 1차 흡수 모델 (Bateman): h(t) = ka/(ka-ke) * (exp(-ke*t) - exp(-ka*t))"""
+    name = "one_compartment"
+
+    def kernel_terms(self, ka, ke, params):
+        if ka == ke:
+            ka = ke + 1e-5
+        amplitude = ka / (ka - ke)
+        return [(amplitude, ke, 0.0), (-amplitude, ka, 0.0)]
+
+
+class TwoCompartmentModel(PKModel):
+    """
+    2구획 1차 흡수 모델 (중심-말초 구획 분포)
+    - k12, k21: 중심 -> 말초, 말초 -> 중심 이동 속도 (1/h)
+    - ke: DrugInfo 반감기에서 구한 최종 소실 속도(β), ka: Tmax에서 구한 흡수 속도
+    특성 방정식의 두 근 α > β (α + β = k10 + k12 + k21, αβ = k10·k21)에서 분포 속도 α를 구합니다.
+    k12, k21은 약물마다 다르고 근거 있는 공통값이 없으므로 DrugInfo.model_params로 반드시 지정해야 합니다.
+    """
+    name = "two_compartment"
+    required_params = ("k12", "k21")
+
+    def kernel_terms(self, ka, ke, params):
+        k12, k21 = params["k12"], params["k21"]
+        beta = ke
+        if k12 <= 0 or k21 <= beta:
+            raise ValueError(f"two_compartment requires k12 > 0 and k21 > ke. Got k12={k12}, k21={k21}, ke={beta}")
+        alpha = (k12 + k21 - beta) / (1.0 - beta / k21)
+        # 흡수 속도가 분포/소실 속도와 같으면 계수 특이점이므로 미세 조정
+        for rate in (alpha, beta):
+            if abs(ka - rate) < 1e-5:
+                ka = rate + 1e-5
+
+        return [
+            (ka * (k21 - alpha) / ((ka - alpha) * (beta - alpha)), alpha, 0.0),
+            (ka * (k21 - beta) / ((ka - beta) * (alpha - beta)), beta, 0.0),
+            (ka * (k21 - ka) / ((alpha - ka) * (beta - ka)), ka, 0.0),
+        ]
+
+
+class ZeroOrderPatchModel(PKModel):
+    """
+    0차 방출 패치 모델
+    1회 용량이 부착 시간(wear_hours) 동안 일정한 속도로 피부 저장소에 방출되고,
+    피부 저장소에서 ka, 혈중에서 ke로 1차 이동/소실합니다.
+    h(t) = (1/T) * ∫[0, min(t, T)] Bateman(t - u) du 이며, 제거 시점(T)의 반대 부호 항으로 표현됩니다.
+    """
+    name = "zero_order_patch"
+    default_params = {"wear_hours": 84.0}
+
+    def kernel_terms(self, ka, ke, params):
+        wear = params["wear_hours"]
+        if wear <= 0:
+            raise ValueError(f"wear_hours must be positive, got {wear}")
+        if ka == ke:
+            ka = ke + 1e-5
+
+        rate_in = 1.0 / wear
+        onset = [
+            (rate_in / ke, 0.0),
+            (-rate_in * ka / (ke * (ka - ke)), ke),
+            (rate_in / (ka - ke), ka),
+        ]
+        return [(a, k, 0.0) for a, k in onset] + [(-a, k, wear) for a, k in onset]
+
+
+PK_MODELS: Dict[str, PKModel] = {}
+
+
+def register_pk_model(model: PKModel, routes: Optional[List[str]] = None):
+    """
+    PK 모델 등록
+    :param routes: 이 모델을 기본값으로 사용할 투여 경로 (DrugInfo.type) 목록
+    """
+    if not model.name:
+        raise ValueError("PK model must define a name.")
+    PK_MODELS[model.name] = model
+    for route in routes or []:
+        ROUTE_DEFAULT_MODELS[route] = model.name
+
+
+def get_pk_model(drug_info) -> PKModel:
+    """약물의 PK 모델: DrugInfo.pk_model > 경로별 기본 모델 > DEFAULT_PK_MODEL"""
+    name = getattr(drug_info, "pk_model", None) or ROUTE_DEFAULT_MODELS.get(drug_info.type, DEFAULT_PK_MODEL)
+    if name not in PK_MODELS:
+        raise ValueError(f"Unknown PK model: {name}. Expected one of {tuple(PK_MODELS)}")
+    return PK_MODELS[name]
+
+
+def evaluate_kernel(terms: KernelTerms, t):
+    """지수항 분해의 임펄스 응답 h(t) (t < 0 및 부동소수점 오차로 인한 음수는 0)"""
+    t = np.asarray(t, dtype=float)
+    conc = np.zeros_like(t)
+    for amplitude, rate, delay in terms:
+        since = t - delay
+        conc += np.where(since >= 0, amplitude * np.exp(-rate * np.maximum(since, 0.0)), 0.0)
+    return np.maximum(conc, 0)
+
+
+def kernel_tail_hours(terms: KernelTerms, epsilon: float) -> float:
+    """
+    임펄스 응답이 epsilon 미만으로 떨어지는 투여 후 경과시간(h)의 상한
+    마지막 지연 이후 h(t) <= Σ|amplitude| * exp(-k_min * (t - delay_max)) 이므로 (k_min: 0이 아닌 최소 속도)
+    delay_max + ln(Σ|amplitude| / epsilon) / k_min 이후의 기여는 epsilon 미만입니다.
+    """
+    rates = [k for _, k, _ in terms if k > 0]
+    if not rates:
+        return float(max(d for _, _, d in terms))
+    total = sum(abs(a) for a, _, _ in terms)
+    return float(max(d for _, _, d in terms) + np.log(max(total / epsilon, 1.0)) / min(rates))
+
+
+def kernel_auc(terms: KernelTerms) -> float:
+    """
+    임펄스 응답의 전체 AUC (단위 용량/분포용적당)
+    rate > 0 항은 amplitude / rate, rate = 0 항(진폭 합 0)은 -amplitude * delay 의 합입니다.
+    """
+    return float(sum(a / k if k > 0 else -a * d for a, k, d in terms))
+
+
+def steady_state_kernel(terms: KernelTerms, since_dose, tau):
+    """
+    간격 τ로 무한히 반복 투여한 항정 상태의 (농도, 기울기(1/h)) (since_dose: 마지막 투약 후 경과시간, [0, τ))
+    - rate > 0: amplitude * exp(-rate * mod(s - delay, τ)) / (1 - exp(-rate * τ))
+    - rate = 0: 아직 시작되지 않은 계단 수만큼 제외 -> -amplitude * ceil(max(delay - s, 0) / τ)
+    """
+    since_dose = np.asarray(since_dose, dtype=float)
+    conc = np.zeros_like(since_dose)
+    slope = np.zeros_like(since_dose)
+    for amplitude, rate, delay in terms:
+        if rate > 0:
+            acc = amplitude * np.exp(-rate * np.mod(since_dose - delay, tau)) / (-np.expm1(-rate * tau))
+            conc += acc
+            slope -= rate * acc
+        else:
+            conc -= amplitude * np.ceil(np.maximum(delay - since_dose, 0.0) / tau)
+    return conc, slope
+
+
+register_pk_model(OneCompartmentModel())
+register_pk_model(TwoCompartmentModel())
+register_pk_model(ZeroOrderPatchModel())
@@ -11,10 +11,13 @@ def create_hormone_chart(
     surgery_mode=False, stop_day=None, resume_day=None, surgery_date=None, start_date=None, anesthesia_type=None,
     lab_data=None,
     stats=None,
-    sim_duration=30
+    sim_duration=30,
+    variability_bands=None
 ):
     """
     호르몬 시뮬레이션 결과를 Plotly 그래프로 생성하여 반환합니다.
+    :param variability_bands: HormoneAnalyzer.simulate_monte_carlo의 백분위 결과
+        {"percentiles": (5, 25, 50, 75, 95), "bands": (백분위 수 × 시간) 배열}, t_dates와 같은 길이로 슬라이싱된 값
     """
     # 1. Label & Threshold Setup
     if unit_choice == "pmol/L":
@@ -32,6 +35,8 @@ def create_hormone_chart(
         all_y_values.extend(list(y_conc_b))
     if lab_data and lab_data.get('values'):
         all_y_values.extend(lab_data['values'])
+    if variability_bands is not None and len(variability_bands["bands"]) > 0:
+        all_y_values.extend(list(variability_bands["bands"][-1]))
     
     y_max_limit = max(np.max(all_y_values) if len(all_y_values) > 0 else 0, guideline_max) * 1.2
 
@@ -142,13 +147,41 @@ def create_hormone_chart(
             yref="y"
         )
 
+    # Population Variability Bands (Monte Carlo 백분위 음영: 바깥 구간일수록 옅게)
+    if variability_bands is not None:
+        pcts = list(variability_bands["percentiles"])
+        bands = variability_bands["bands"]
+        n_pairs = len(pcts) // 2
+        for i in range(n_pairs):
+            lower, upper = bands[i], bands[len(pcts) - 1 - i]
+            alpha = 0.10 + 0.12 * i
+            fig.add_trace(go.Scatter(
+                x=t_dates, y=upper,
+                mode='lines', line=dict(width=0),
+                showlegend=False, hoverinfo='skip'
+            ), secondary_y=False)
+            fig.add_trace(go.Scatter(
+                x=t_dates, y=lower,
+                mode='lines', line=dict(width=0),
+                fill='tonexty', fillcolor=f'rgba(255, 105, 180, {alpha:.2f})',
+                name=f"{utils.t('variability_band')} P{pcts[i]:g}–P{pcts[len(pcts) - 1 - i]:g}",
+                hoverinfo='skip'
+            ), secondary_y=False)
+        if len(pcts) % 2 == 1:
+            fig.add_trace(go.Scatter(
+                x=t_dates, y=bands[n_pairs],
+                mode='lines',
+                name=f"{utils.t('variability_median')} (P{pcts[n_pairs]:g})",
+                line=dict(color='#C71585', width=1, dash='dot'),
+            ), secondary_y=False)
+
     # Main Traces (Estradiol)
     fig.add_trace(go.Scatter(
         x=t_dates, y=y_conc,
         mode='lines',
         name=f"E2: {utils.t('scenario_a')}" if compare_mode else f"{utils.t('predicted_e2')} ({unit_choice})",
         line=dict(color='#FF69B4', width=2),
-        fill='tozeroy' if not compare_mode else None,
+        fill='tozeroy' if not compare_mode and variability_bands is None else None,
         fillcolor='rgba(255, 105, 180, 0.1)'
     ), secondary_y=False)
     
@@ -8,27 +8,140 @@ import plot
 import analysis
 
 
-@st.cache_data(show_spinner=False)
-def run_simulation_cached(drug_schedule, user_profile, sim_duration, calibration_factors, stop_day, resume_day, surgery_mode):
-    #시뮬레이션 로직 캐싱: 입력값이 동일할 경우 재계산을 방지하여 성능 최적화
-    local_analyzer = analysis.HormoneAnalyzer(
-        user_weight=user_profile['weight'],
-        user_age=user_profile['age'],
-        ast=user_profile.get('ast', 20.0),
-        alt=user_profile.get('alt', 20.0),
-        body_fat=user_profile.get('body_fat', 22.0),
-        user_height=user_profile.get('height', 170.0)
-    )
-    # [최적화] resolution을 24(1시간 단위)로 설정하여 모바일 렌더링 부하 감소 (기본값 100 대비 경량화)
-    return local_analyzer.simulate_schedule(
-        drug_schedule, 
-        days=sim_duration,
-        resolution=24, 
-        calibration_factors=calibration_factors,
-        stop_day=stop_day if surgery_mode else None,
-        resume_day=resume_day if surgery_mode else None
+def run_simulation_incremental(state_key, drug_schedule, user_profile, sim_duration, calibration_factors, pk_params=None):
+    """
+    항목 단위 증분 시뮬레이션 (세션별로 보관)
+    프로필/기간/보정계수/PK 피팅값이 그대로면 추가·삭제·수정된 약물의 성분만 더하거나 빼서 갱신합니다.
+    """
+    pk_params = pk_params or {}
+    config = (
+        float(user_profile['weight']), int(user_profile['age']),
+        float(user_profile.get('ast', 20.0)), float(user_profile.get('alt', 20.0)),
+        float(user_profile.get('body_fat', 22.0)), float(user_profile.get('height', 170.0)),
+        sim_duration,
+        tuple(sorted(calibration_factors.items())),
+        tuple(sorted((name, tuple(sorted(p.items()))) for name, p in pk_params.items())),
     )
 
+    cached = st.session_state.get(state_key)
+    if cached is None or cached[0] != config:
+        local_analyzer = analysis.HormoneAnalyzer(
+            user_weight=user_profile['weight'],
+            user_age=user_profile['age'],
+            ast=user_profile.get('ast', 20.0),
+            alt=user_profile.get('alt', 20.0),
+            body_fat=user_profile.get('body_fat', 22.0),
+            user_height=user_profile.get('height', 170.0)
+        )
+        # [최적화] resolution을 24(1시간 단위)로 설정하여 모바일 렌더링 부하 감소 (기본값 100 대비 경량화)
+        incremental = analysis.IncrementalSimulator(
+            local_analyzer,
+            days=sim_duration,
+            resolution=24,
+            calibration_factors=calibration_factors,
+            method="closed_form",
+            pk_params=pk_params
+        )
+        st.session_state[state_key] = (config, incremental)
+    else:
+        incremental = cached[1]
+
+    return incremental.update(drug_schedule)
+
+
+def _convert_stats_unit(stats, unit_choice):
+    """pg/mL 기준 통계를 표시 단위로 변환 (fluctuation은 무차원이므로 그대로 유지)"""
+    if unit_choice != "pmol/L":
+        return stats
+    return {
+        key: value if key == "fluctuation" else utils.convert_e2_unit(value, "pmol/L")
+        for key, value in stats.items()
+    }
+
+
+def _render_sensitivity_table(analyzer, schedule_list, calibration_factors, unit_choice, pk_params=None):
+    """용량/간격/체중/보정계수 변화에 따른 항정 상태 통계 변화량 표 (해석적 미분의 1차 근사)"""
+    sensitivity = analyzer.steady_state_sensitivity(schedule_list, calibration_factors, pk_params)
+    if sensitivity is None or not any(sensitivity["items"]):
+        return
+
+    def _row(label, derivative, step):
+        values = [utils.convert_e2_unit(derivative[k] * step, unit_choice) for k in ("peak", "trough", "avg")]
+        return f"| {label} | " + " | ".join(f"{v:+.1f}" for v in values) + f" | {derivative['fluctuation'] * step:+.1f}%p |"
+
+    rows = []
+    for index, entry in enumerate(sensitivity["items"]):
+        if entry is None:
+            continue
+        rows.append(_row(f"{entry['name']} +1 mg", entry["dose"], 1.0))
+        # 간격 변화 단위: 1일 이하 간격(매일/분할 투약)은 1시간, 그보다 긴 간격(주사 등)은 1일
+        if float(schedule_list[index]['interval']) <= 1.0:
+            rows.append(_row(f"{entry['name']} {utils.t('sens_interval_hour')}", entry["interval"], 1.0 / 24))
+        else:
+            rows.append(_row(f"{entry['name']} {utils.t('sens_interval_day')}", entry["interval"], 1.0))
+    rows.append(_row(utils.t("sens_weight_step"), sensitivity["weight"], 1.0))
+    for route, derivative in sensitivity["calibration"].items():
+        rows.append(_row(f"{route} {utils.t('sens_calibration_step')}", derivative, 0.1))
+
+    with st.expander(utils.t("sens_title"), expanded=False):
+        st.caption(utils.t("sens_caption"))
+        header = (
+            f"| {utils.t('sens_change')} | Δ{utils.t('peak')} ({unit_choice}) | Δ{utils.t('trough')} ({unit_choice}) "
+            f"| Δ{utils.t('avg')} ({unit_choice}) | Δ{utils.t('fluctuation')} |\n|---|---|---|---|---|"
+        )
+        st.markdown(header + "\n" + "\n".join(rows))
+
+
+def _render_regimen_optimizer(analyzer, calibration_factors, unit_choice, pk_params=None):
+    """목표 범위(GUIDELINES)를 만족하는 처방 후보 제시 및 원클릭 추가"""
+    with st.expander(utils.t("opt_title"), expanded=False):
+        st.caption(utils.t("opt_caption"))
+        drug_options = [name for name, info in data.DRUG_DB.items() if info.type in analysis.OPTIMIZER_DOSE_STEPS]
+        guideline_options = [key for key, value in data.GUIDELINES.items() if "e2_min" in value and "e2_max" in value]
+
+        col_drug, col_target = st.columns(2)
+        with col_drug:
+            drug_name = st.selectbox(utils.t("select_drug"), drug_options, key="opt_drug")
+        with col_target:
+            guideline = st.selectbox(
+                utils.t("opt_target"),
+                guideline_options,
+                format_func=lambda key: (
+                    f"{data.GUIDELINES[key]['source']} "
+                    f"({data.GUIDELINES[key]['e2_min']:.0f}-{data.GUIDELINES[key]['e2_max']:.0f} pg/mL)"
+                ),
+                key="opt_guideline",
+            )
+
+        candidates = analyzer.optimize_regimen(drug_name, guideline, calibration_factors, top_n=3, pk_params=pk_params)
+        if not candidates:
+            st.info(utils.t("opt_none"))
+            return
+
+        for idx, candidate in enumerate(candidates):
+            item = candidate["item"]
+            interval = item["interval"]
+            if interval < 1:
+                schedule_text = utils.t("opt_daily_split").format(count=round(1 / interval))
+            else:
+                schedule_text = utils.t("opt_every_days").format(days=f"{interval:g}")
+            trough = utils.convert_e2_unit(candidate["trough"], unit_choice)
+            peak = utils.convert_e2_unit(candidate["peak"], unit_choice)
+
+            col_text, col_btn = st.columns([4, 1])
+            with col_text:
+                st.markdown(
+                    f"**{item['dose']:g} mg · {schedule_text}** — "
+                    f"{utils.t('trough')} {trough:.0f} / {utils.t('peak')} {peak:.0f} {unit_choice}, "
+                    f"{utils.t('fluctuation')} {candidate['fluctuation']:.0f}%"
+                )
+            with col_btn:
+                if st.button(utils.t("opt_apply_btn"), key=f"opt_apply_{idx}", width="stretch"):
+                    new_drug = dict(item, id=datetime.now().strftime("%H%M%S"))
+                    st.session_state.drug_schedule.append(new_drug)
+                    st.toast(utils.t("added_toast").format(name=drug_name), icon="🎯")
+                    st.rerun()
+
 
 def render_simulator_tab(analyzer):
     st.markdown(f"### {utils.t('sim_title')}")
@@ -47,9 +160,14 @@ def render_simulator_tab(analyzer):
             value=False,
             help=utils.t("intensive_24h_help"),
         )
+        show_variability = st.toggle(
+            utils.t("variability_toggle"),
+            value=False,
+            help=utils.t("variability_help"),
+        )
 
     # 1. 그래프에 그릴 '에스트로겐' 제형만 정의
-    estrogen_types = ["Injection", "Oral", "Transdermal", "Sublingual"]
+    estrogen_types = analysis.ESTROGEN_ROUTES
 
     # 2. 해당 제형인 약물만 필터링하여 시뮬레이션 투입
     e2_sched = [
@@ -57,41 +175,19 @@ def render_simulator_tab(analyzer):
         if d['name'] in data.DRUG_DB and data.DRUG_DB[d['name']].type in estrogen_types
     ]
 
-    # 2. 시뮬레이션 실행 (E2)
-    # [변경] 내부적으로는 항정 상태를 위해 충분히 긴 기간(180일)을 시뮬레이션
-    calc_duration = 180
-    t_full, y_full = run_simulation_cached(
-        e2_sched,
-        st.session_state.user_profile,
-        calc_duration,
-        st.session_state.calibration_factors,
-        st.session_state.stop_day,
-        st.session_state.resume_day,
-        False
-    )
-
-    y_full_b = None
+    e2_sched_b = []
     if st.session_state.compare_mode:
         e2_sched_b = [
             d for d in st.session_state.drug_schedule_b 
             if d['name'] in data.DRUG_DB and data.DRUG_DB[d['name']].type in estrogen_types
         ]
-        
-        _, y_full_b = run_simulation_cached(
-            e2_sched_b,
-            st.session_state.user_profile,
-            calc_duration,
-            st.session_state.calibration_factors,
-            st.session_state.stop_day,
-            st.session_state.resume_day,
-            False
-        )
 
-    # 4. 단위 변환
-    if unit_choice == "pmol/L":
-        y_full = utils.convert_e2_unit(y_full, "pmol/L")
-        if y_full_b is not None:
-            y_full_b = utils.convert_e2_unit(y_full_b, "pmol/L")
+    # 3. 항정 상태 통계 (규칙적인 스케줄은 해석해로 즉시 계산, 불규칙 스케줄만 장기 시뮬레이션 사용)
+    calibration_factors = st.session_state.calibration_factors
+    pk_params = st.session_state.get("pk_params", {})
+    steady_stats = analyzer.steady_state_stats(e2_sched, calibration_factors, pk_params)
+    steady_stats_b = analyzer.steady_state_stats(e2_sched_b, calibration_factors, pk_params) if st.session_state.compare_mode else None
+    needs_steady_sim = steady_stats is None or (st.session_state.compare_mode and steady_stats_b is None)
 
     # [날짜 변환 준비]
     start_dt = datetime.combine(st.session_state.start_date, datetime.min.time())
@@ -115,22 +211,67 @@ def render_simulator_tab(analyzer):
                 lab_texts.append(f"{utils.t('actual_measure')} ({route}): {val:.1f} {unit_choice}")
                 lab_points_for_rmse.append((record['day'], val))
 
+    # 4. 시뮬레이션 실행 (E2)
+    # [변경] 해석해가 있으면 화면 표시 기간(및 RMSE용 피검사일)까지만 시뮬레이션,
+    # 없으면 항정 상태 분석을 위해 충분히 긴 기간(180일)을 시뮬레이션
+    if needs_steady_sim:
+        calc_duration = 180
+    else:
+        last_lab_day = max((float(day) for day, _ in lab_points_for_rmse), default=0.0)
+        calc_duration = max(sim_duration, int(np.ceil(last_lab_day)) + 1)
 
-    # 5. 통계 계산 (항정 상태 분석을 위해 90일~180일 구간 데이터 사용)
-    # 대부분의 약물이 90일 이전에 항정 상태(Steady State)에 도달하므로, 이 구간의 통계가 가장 정확합니다.
-    steady_mask = (t_full >= 90) & (t_full <= 180)
-    has_steady = np.any(steady_mask)
-    
-    stats_y = y_full[steady_mask] if has_steady else y_full
-    stats_t = t_full[steady_mask] if has_steady else t_full
+    t_full, y_full = run_simulation_incremental(
+        "sim_incremental_a",
+        e2_sched,
+        st.session_state.user_profile,
+        calc_duration,
+        calibration_factors,
+        pk_params
+    )
 
-    stats = utils.calculate_stats(stats_y, stats_t)
-    rmse = utils.calculate_rmse(t_full, y_full, lab_points_for_rmse)
-    
-    stats_b = None
-    if st.session_state.compare_mode and y_full_b is not None:
-        stats_y_b = y_full_b[steady_mask] if has_steady else y_full_b
-        stats_b = utils.calculate_stats(stats_y_b, stats_t)
+    y_full_b = None
+    if st.session_state.compare_mode:
+        _, y_full_b = run_simulation_incremental(
+            "sim_incremental_b",
+            e2_sched_b,
+            st.session_state.user_profile,
+            calc_duration,
+            calibration_factors,
+            pk_params
+        )
+
+    # 5. 단위 변환
+    if unit_choice == "pmol/L":
+        y_full = utils.convert_e2_unit(y_full, "pmol/L")
+        if y_full_b is not None:
+            y_full_b = utils.convert_e2_unit(y_full_b, "pmol/L")
+
+    # 6. 통계 계산
+    # RMSE는 검사 시각의 농도를 격자 없이 정확히 평가 (격자 최근접값으로 인한 양자화 방지)
+    lab_predictions = analyzer.concentration_at(
+        e2_sched, [day for day, _ in lab_points_for_rmse], calibration_factors, pk_params=pk_params
+    )
+    if unit_choice == "pmol/L":
+        lab_predictions = utils.convert_e2_unit(lab_predictions, "pmol/L")
+    rmse = utils.calculate_rmse(t_full, y_full, lab_points_for_rmse, predictions=lab_predictions)
+    if needs_steady_sim:
+        # 항정 상태 분석을 위해 90일~180일 구간 데이터 사용
+        # 대부분의 약물이 90일 이전에 항정 상태(Steady State)에 도달하므로, 이 구간의 통계가 가장 정확합니다.
+        steady_mask = (t_full >= 90) & (t_full <= 180)
+        has_steady = np.any(steady_mask)
+
+        stats_y = y_full[steady_mask] if has_steady else y_full
+        stats_t = t_full[steady_mask] if has_steady else t_full
+
+        stats = utils.calculate_stats(stats_y, stats_t)
+
+        stats_b = None
+        if st.session_state.compare_mode and y_full_b is not None:
+            stats_y_b = y_full_b[steady_mask] if has_steady else y_full_b
+            stats_b = utils.calculate_stats(stats_y_b, stats_t)
+    else:
+        stats = _convert_stats_unit(steady_stats, unit_choice)
+        stats_b = _convert_stats_unit(steady_stats_b, unit_choice) if steady_stats_b is not None else None
 
     # [그래프 표시용 데이터 슬라이싱] 사용자가 선택한 sim_duration만큼 잘라서 표시
     view_mask = t_full <= sim_duration
@@ -138,6 +279,23 @@ def render_simulator_tab(analyzer):
     y_conc = y_full[view_mask]
     y_conc_b = y_full_b[view_mask] if y_full_b is not None else None
 
+    # 개인차 범위: 같은 격자(하루 24점, calc_duration일)의 Monte Carlo 백분위 곡선 (재실행 간 일관성을 위해 고정 시드)
+    variability_bands = None
+    if show_variability:
+        _, mc_result = analyzer.simulate_monte_carlo(
+            e2_sched,
+            n_samples=500,
+            days=calc_duration,
+            resolution=24,
+            calibration_factors=calibration_factors,
+            seed=0,
+            pk_params=pk_params
+        )
+        bands = mc_result["bands"][:, view_mask]
+        if unit_choice == "pmol/L":
+            bands = utils.convert_e2_unit(bands, "pmol/L")
+        variability_bands = {"percentiles": mc_result["percentiles"], "bands": bands}
+
     # [날짜 변환] 슬라이싱된 t_days를 기준으로 날짜 리스트 생성
     t_dates = [start_dt + timedelta(days=float(t)) for t in t_days]
 
@@ -150,6 +308,8 @@ def render_simulator_tab(analyzer):
         t_plot_days = t_days[mask]
         y_plot_conc = y_conc[mask]
         y_plot_conc_b = y_conc_b[mask] if y_conc_b is not None else None
+        if variability_bands is not None:
+            variability_bands = {**variability_bands, "bands": variability_bands["bands"][:, mask]}
         
         # 현재는 일관성을 위해 실제 날짜 객체 리스트 사용
         t_plot_dates = [start_dt + timedelta(days=float(t)) for t in t_plot_days]
@@ -180,7 +340,8 @@ def render_simulator_tab(analyzer):
         "stats": stats,
         "stats_b": stats_b,
         "rmse": rmse,
-        "sim_duration": 2 if intensive_view else sim_duration
+        "sim_duration": 2 if intensive_view else sim_duration,
+        "variability_bands": variability_bands
     }
     st.session_state.last_sim_data = sim_data
     
@@ -189,7 +350,7 @@ def render_simulator_tab(analyzer):
         "compare_mode", "y_conc_b",
         "surgery_mode", "stop_day", "resume_day",
         "surgery_date", "start_date", "anesthesia_type",
-        "lab_data", "stats", "sim_duration",
+        "lab_data", "stats", "sim_duration", "variability_bands",
     ]
     chart_payload = {k: sim_data.get(k) for k in chart_keys}
     fig = plot.create_hormone_chart(**chart_payload)
@@ -239,6 +400,9 @@ def render_simulator_tab(analyzer):
     if st.session_state.compare_mode and y_conc_b is not None:
         st.caption(utils.t("delta_caption"))
 
+    _render_sensitivity_table(analyzer, e2_sched, calibration_factors, unit_choice, pk_params)
+    _render_regimen_optimizer(analyzer, calibration_factors, unit_choice, pk_params)
+
     # RMSE 기반 모델 신뢰도 표시 및 보정 권고
     rel_text, rel_color = None, None
     if rmse is not None:
@@ -276,6 +440,22 @@ def render_simulator_tab(analyzer):
     
     # 시뮬레이션 탭 내부에 있으므로 현재 계산된 stats 사용 가능
     sim_stats = stats
+
+    # 전체 처방(항안드로겐 포함)의 예상 테스토스테론 (억제 반응이 평형에 도달하도록 최소 60일)
+    t_analytes, analytes = analyzer.simulate_analytes(
+        current_drugs,
+        days=max(calc_duration, 60),
+        resolution=24,
+        calibration_factors=calibration_factors,
+        method="closed_form",
+        pk_params=pk_params
+    )
+    analyte_summary = utils.summarize_analytes(t_analytes, analytes)
+    if "T" in analyte_summary:
+        st.caption(utils.t("analyte_t_caption").format(
+            level=analyte_summary["T"]["avg"],
+            target=data.GUIDELINES["WPATH_SOC8"]["t_max"]
+        ))
     
     analysis_res = utils.perform_safety_analysis(
         current_drugs,
@@ -288,7 +468,8 @@ def render_simulator_tab(analyzer):
         st.session_state.unit_choice,
         False, # compare_mode 생략
         checklist=checklist,
-        interactors=st.session_state.selected_interactors
+        interactors=st.session_state.selected_interactors,
+        analyte_summary=analyte_summary
     )
     
     # 1. 위험 경고 출력
@@ -322,7 +503,7 @@ def render_simulator_tab(analyzer):
 
     st.info(utils.t("monitoring_guide_info"))
     
-    monitoring_table = utils.get_monitoring_messages(current_drugs, checklist)
+    monitoring_table = utils.get_monitoring_messages(current_drugs, checklist, analyte_summary)
     if monitoring_table:
         st.markdown(monitoring_table)
 
@@ -0,0 +1,54 @@
+"""적응형 격자: 균일 격자보다 적은 격자점으로 같거나 더 정확한 피크"""
+
+import numpy as np
+import pytest
+
+import analysis
+
+SCHEDULES = {
+    "sublingual_tid": [{"name": "Sublingual Estradiol (Estrofem)", "dose": 1.0, "interval": 1 / 3}],
+    "oral_bid": [{"name": "Estradiol Valerate (Progynova)", "dose": 2.0, "interval": 0.5}],
+    "injection_weekly": [{"name": "Estradiol Valerate (Progynon Depot)", "dose": 5.0, "interval": 7}],
+}
+MIXED_BID = [
+    {"name": "Estradiol Valerate (Progynova)", "dose": 2.0, "interval": 0.5},
+    {"name": "Estrogel (Pump)", "dose": 1.5, "interval": 0.5},
+    {"name": "Cyproterone Acetate (Androcur)", "dose": 12.5, "interval": 0.5},
+]
+DAYS = 30
+
+
+@pytest.fixture
+def analyzer():
+    return analysis.HormoneAnalyzer(user_weight=70, user_age=30, ast=40, alt=50, body_fat=25, user_height=175)
+
+
+@pytest.mark.parametrize("resolution", [24, 100])
+@pytest.mark.parametrize("name", sorted(SCHEDULES))
+def test_adaptive_grid_has_fewer_points_and_better_peak(analyzer, name, resolution):
+    schedule = SCHEDULES[name]
+    _, dense = analyzer.simulate_schedule(schedule, days=DAYS, resolution=24 * 240, method="fused")
+    true_peak = dense.max()
+
+    t_uniform, c_uniform = analyzer.simulate_schedule(schedule, days=DAYS, resolution=resolution, method="closed_form")
+    t_adaptive, c_adaptive = analyzer.simulate_schedule(
+        schedule, days=DAYS, resolution=resolution, method="closed_form", grid="adaptive"
+    )
+
+    assert len(t_adaptive) < len(t_uniform)
+    assert np.all(np.diff(t_adaptive) > 0)
+    assert abs(c_adaptive.max() - true_peak) <= abs(c_uniform.max() - true_peak)
+
+
+def test_adaptive_grid_stays_below_uniform_for_mixed_schedule(analyzer):
+    t_uniform, _ = analyzer.simulate_schedule(MIXED_BID, days=DAYS, resolution=24, method="closed_form")
+    t_adaptive, _ = analyzer.simulate_schedule(MIXED_BID, days=DAYS, resolution=24, method="closed_form", grid="adaptive")
+    assert len(t_adaptive) < len(t_uniform)
+
+
+def test_superposed_peak_offsets_match_single_dose_tmax(analyzer):
+    ka, ke = 0.4, 0.05
+    offsets = analyzer._get_superposed_peak_offsets(np.array([0.0, 12.0, 24.0]), ka, ke)
+    assert offsets[0] == pytest.approx(np.log(ka / ke) / (ka - ke))
+    # 누적 투약이 많을수록 피크가 투약 직후로 당겨짐
+    assert offsets[2] < offsets[1] < offsets[0]
@@ -0,0 +1,61 @@
+"""보정계수 산출: 검사 기록 수와 무관한 1회 시뮬레이션, 시뮬레이션 기간과 무관한 Trough"""
+
+import numpy as np
+import pytest
+
+import analysis
+
+SCHEDULE = [
+    {"name": "Estradiol Valerate (Progynon Depot)", "dose": 5.0, "interval": 7},
+    {"name": "Estradiol Valerate (Progynova)", "dose": 2.0, "interval": 0.5},
+]
+
+
+@pytest.fixture
+def analyzer():
+    analysis.clear_caches()
+    return analysis.HormoneAnalyzer(user_weight=70, user_age=30, ast=40, alt=50, body_fat=25, user_height=175)
+
+
+def test_weighted_calibration_simulates_once(analyzer, monkeypatch):
+    calls = []
+    original = analysis.HormoneAnalyzer._get_fused_groups
+
+    def _counting(self, *args, **kwargs):
+        calls.append(args)
+        return original(self, *args, **kwargs)
+
+    monkeypatch.setattr(analysis.HormoneAnalyzer, "_get_fused_groups", _counting)
+    lab_history = [{"day": day, "value": 150 + 5 * i} for i, day in enumerate((3, 6, 9, 13, 16, 20, 24, 29, 33, 40))]
+
+    analyzer.calculate_weighted_calibration_factor(SCHEDULE, lab_history, "Injection", {"Oral": 1.1})
+
+    assert len(calls) == 1
+    assert analysis.get_cache_stats()["calibration"]["misses"] == 1
+
+
+def test_record_factor_does_not_depend_on_horizon(analyzer):
+    lab_days, lab_values = np.array([6.0, 13.0, 20.0]), np.array([180.0, 240.0, 260.0])
+    factors = [
+        analyzer._factors_from_components(
+            analyzer._get_calibration_components(SCHEDULE, horizon, "Injection", {}), lab_days, lab_values
+        )
+        for horizon in (28, 56, 84)
+    ]
+    np.testing.assert_array_equal(factors[0], factors[1])
+    np.testing.assert_array_equal(factors[0], factors[2])
+
+
+def test_trough_matches_exact_concentration(analyzer):
+    # 검사일 13일 윈도우의 Trough는 주사/경구 투약 직전 시각 -> 투약 시각의 정확한 농도와 일치
+    lab_day, lab_value = 13.0, 240.0
+    factor = analyzer.calculate_calibration_factor(SCHEDULE, lab_day, lab_value, "Injection", {})
+
+    window = np.union1d(np.linspace(lab_day - 0.5, lab_day + 0.1, 20001), [12.5, 13.0])
+    injection = [item for item in SCHEDULE if item["interval"] == 7]
+    others = [item for item in SCHEDULE if item["interval"] != 7]
+    c_target = analyzer.concentration_at(injection, window)
+    c_other = analyzer.concentration_at(others, window)
+    idx = int(np.argmin(c_target + c_other))
+    expected = np.clip((lab_value - c_other[idx]) / c_target[idx], 0.1, 5.0)
+    assert factor == pytest.approx(expected, rel=1e-6)
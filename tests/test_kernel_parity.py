@@ -0,0 +1,131 @@
+"""중첩 방식(fft, fused - Numba / NumPy 대체 경로)과 loop/closed_form 기준 구현의 일치 여부"""
+
+import dataclasses
+
+import numpy as np
+import pytest
+
+import analysis
+import data
+import pk_models
+
+SCHEDULE = [
+    {"name": "Estradiol Valerate (Progynon Depot)", "dose": 5.0, "interval": 7},
+    {"name": "Estradiol Valerate (Progynova)", "dose": 2.0, "interval": 0.5},
+    {"name": "Estrogel (Pump)", "dose": 1.5, "interval": 1},
+    {"name": "Cyproterone Acetate (Androcur)", "dose": 12.5, "interval": 1},
+]
+
+# fft 검증용 스케줄: 격자 밖 투약 시각, 주기 투약, 중단/재개를 포함
+FFT_CASES = {
+    "multi_drug": dict(schedule_list=SCHEDULE),
+    # 0.37일 간격은 균일 격자 간격(days*24 / (점 수 - 1) h)과 어긋나 대부분의 투약이 격자점 사이에 놓임
+    "off_grid": dict(schedule_list=[
+        {"name": "Estradiol Valerate (Progynova)", "dose": 2.0, "interval": 0.37},
+        {"name": "Sublingual Estradiol (Estrofem)", "dose": 1.0, "interval": 0.29},
+    ]),
+    "cycling": dict(schedule_list=[
+        {"name": "Estradiol Valerate (Progynova)", "dose": 2.0, "interval": 7, "is_cycling": True, "offset": 1.5, "duration": 3},
+        {"name": "Estradiol Valerate (Progynon Depot)", "dose": 5.0, "interval": 10},
+    ]),
+    "stop_resume": dict(
+        schedule_list=[
+            {"name": "Estradiol Valerate (Progynon Depot)", "dose": 5.0, "interval": 5},
+            {"name": "Estrogel (Pump)", "dose": 1.5, "interval": 1},
+        ],
+        stop_day=20, resume_day=33, pauses=[(45.5, 50.25)],
+    ),
+}
+
+COMPILED_MODES = [
+    False,
+    pytest.param(True, marks=pytest.mark.skipif(not analysis.NUMBA_AVAILABLE, reason="numba is not installed")),
+]
+
+
+def _random_groups(n_doses, days, seed=0):
+    """PK 모델별 임의 투약열 (지연항이 있는 패치 모델, 3항 2구획 모델 포함)"""
+    rng = np.random.default_rng(seed)
+    groups = []
+    models = (
+        ("one_compartment", 0.3, 0.02, None),
+        ("zero_order_patch", 0.5, 0.03, None),
+        ("two_compartment", 0.2, 0.01, {"k12": 0.5, "k21": 0.3}),
+    )
+    for model_name, ka, ke, params in models:
+        model = pk_models.PK_MODELS[model_name]
+        times = np.sort(rng.uniform(0, days * 24, n_doses))
+        groups.append((times, rng.uniform(0.5, 2.0, n_doses), model.kernel_terms(ka, ke, model.resolve_params(params))))
+    return groups
+
+
+def _relative_error(actual, expected):
+    return float(np.max(np.abs(actual - expected)) / max(float(np.max(np.abs(expected))), 1e-12))
+
+
+@pytest.fixture
+def analyzer():
+    return analysis.HormoneAnalyzer(user_weight=70, user_age=30, ast=40, alt=50, body_fat=25, user_height=175)
+
+
+@pytest.mark.parametrize("compiled", COMPILED_MODES)
+def test_fused_matches_reference_methods(analyzer, monkeypatch, compiled):
+    monkeypatch.setattr(analysis, "NUMBA_AVAILABLE", compiled)
+    t_loop, loop = analyzer.simulate_schedule(SCHEDULE, days=60, resolution=24, method="loop")
+    _, closed_form = analyzer.simulate_schedule(SCHEDULE, days=60, resolution=24, method="closed_form")
+    t_fused, fused = analyzer.simulate_schedule(SCHEDULE, days=60, resolution=24, method="fused")
+
+    np.testing.assert_array_equal(t_fused, t_loop)
+    assert _relative_error(fused, loop) < 1e-9
+    assert _relative_error(fused, closed_form) < 1e-9
+
+
+@pytest.mark.parametrize("resolution", [24, 37])
+@pytest.mark.parametrize("case", sorted(FFT_CASES))
+def test_fft_matches_loop(analyzer, case, resolution):
+    kwargs = FFT_CASES[case]
+    t_loop, loop = analyzer.simulate_schedule(days=60, resolution=resolution, method="loop", **kwargs)
+    t_fft, fft = analyzer.simulate_schedule(days=60, resolution=resolution, method="fft", **kwargs)
+
+    np.testing.assert_array_equal(t_fft, t_loop)
+    assert _relative_error(fft, loop) < 1e-9
+
+
+def test_fft_matches_loop_for_delayed_kernel(analyzer, monkeypatch):
+    # 지연 항이 있는 0차 방출 패치 모델: 제거 시점(투약 + 부착 시간)도 격자 밖에 놓임
+    patch = dataclasses.replace(
+        data.DRUG_DB["Estrogel (Pump)"], pk_model="zero_order_patch", model_params={"wear_hours": 83.3}
+    )
+    monkeypatch.setitem(data.DRUG_DB, "Test Patch", patch)
+    schedule = [{"name": "Test Patch", "dose": 0.1, "interval": 3.5}]
+    _, loop = analyzer.simulate_schedule(schedule, days=60, resolution=24, method="loop", stop_day=30, resume_day=37.3)
+    _, fft = analyzer.simulate_schedule(schedule, days=60, resolution=24, method="fft", stop_day=30, resume_day=37.3)
+    assert _relative_error(fft, loop) < 1e-9
+
+
+def test_numpy_path_matches_kernel_function():
+    # Numba 없이도 검증할 수 있도록 JIT 대상 커널 함수를 순수 Python으로 실행 (작은 입력)
+    days = 10
+    t = np.linspace(0, days * 24, days * 24)
+    groups = _random_groups(n_doses=30, days=days)
+    reference = analysis.superpose_dose_groups(t, groups, compiled=False)
+
+    kernel = np.zeros_like(t)
+    for times, weights, terms in groups:
+        tail = np.array([pk_models.kernel_tail_hours(terms, analysis.EVENT_TAIL_EPSILON)])
+        amp, rate, delay = (np.array([column]) for column in zip(*terms))
+        analysis._accumulate_doses(
+            t, times, weights, np.zeros(len(times), dtype=np.int64),
+            amp, rate, delay, np.array([len(terms)]), tail, kernel,
+        )
+    assert _relative_error(kernel, reference) < 1e-12
+
+
+@pytest.mark.skipif(not analysis.NUMBA_AVAILABLE, reason="numba is not installed")
+def test_compiled_kernel_matches_numpy_path():
+    days = 60
+    t = np.linspace(0, days * 24, days * 24)
+    groups = _random_groups(n_doses=500, days=days)
+    reference = analysis.superpose_dose_groups(t, groups, compiled=False)
+    compiled = analysis.superpose_dose_groups(t, groups, compiled=True)
+    assert _relative_error(compiled, reference) < 1e-12
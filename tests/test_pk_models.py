@@ -0,0 +1,20 @@
+"""PK 모델 레지스트리 파라미터 처리"""
+
+import pytest
+
+import pk_models
+
+
+def test_two_compartment_requires_rate_constants():
+    model = pk_models.PK_MODELS["two_compartment"]
+    with pytest.raises(ValueError, match="requires model_params"):
+        model.resolve_params(None)
+    with pytest.raises(ValueError, match="requires model_params"):
+        model.resolve_params({"k12": 0.5})
+    assert model.resolve_params({"k12": 0.5, "k21": 0.3}) == {"k12": 0.5, "k21": 0.3}
+
+
+def test_unknown_model_params_are_rejected():
+    with pytest.raises(ValueError, match="Unknown parameters"):
+        pk_models.PK_MODELS["zero_order_patch"].resolve_params({"k12": 0.5})
+    assert pk_models.PK_MODELS["zero_order_patch"].resolve_params(None) == {"wear_hours": 84.0}
@@ -0,0 +1,32 @@
+"""항정 상태 해석해의 공통 주기"""
+
+import pytest
+
+import analysis
+
+
+@pytest.mark.parametrize("intervals, expected", [
+    ([24.024], 24.024),
+    ([12.0, 12.0], 12.0),
+    ([168.0, 84.0, 12.0], 168.0),
+    ([8.0, 12.0], 24.0),
+    ([120.0, 168.0], 840.0),
+])
+def test_common_period(intervals, expected):
+    assert analysis.HormoneAnalyzer._get_common_period(intervals) == pytest.approx(expected)
+
+
+def test_common_period_beyond_cap():
+    # 24.024 h와 12 h의 공통 주기는 500일 -> 상한(STEADY_MAX_PERIOD_DAYS) 초과
+    assert analysis.HormoneAnalyzer._get_common_period([24.024, 12.0]) is None
+
+
+def test_single_irregular_interval_has_steady_state():
+    analyzer = analysis.HormoneAnalyzer(user_weight=70, user_age=30, ast=40, alt=50, body_fat=25, user_height=175)
+    schedule = [{"name": "Estradiol Valerate (Progynova)", "dose": 2.0, "interval": 1.001}]
+    stats = analyzer.steady_state_stats(schedule)
+    assert stats is not None
+    assert analyzer.steady_state_sensitivity(schedule) is not None
+
+    _, conc = analyzer.simulate_schedule(schedule, days=60, resolution=24 * 60, method="closed_form")
+    assert stats["peak"] == pytest.approx(conc[-24 * 60 * 3:].max(), rel=1e-3)
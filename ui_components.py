@@ -3,6 +3,7 @@ from datetime import datetime, timedelta
 
 import utils
 import data
+import analysis
 import EMR
 
 # -----------------------------------------------------------------------------
@@ -431,7 +432,8 @@ def render_calibration_tab(analyzer):
                     st.session_state.drug_schedule,
                     st.session_state.lab_history[target_route],
                     target_route=target_route,
-                    current_factors=st.session_state.calibration_factors
+                    current_factors=st.session_state.calibration_factors,
+                    pk_params=st.session_state.pk_params
                 )
                 st.session_state.calibration_factors[target_route] = new_k
                 route_name = utils.t("route_" + target_route.lower().replace("-", "_"))
@@ -451,7 +453,8 @@ def render_calibration_tab(analyzer):
                         st.session_state.drug_schedule,
                         st.session_state.lab_history[target_route],
                         target_route=target_route,
-                        current_factors=st.session_state.calibration_factors
+                        current_factors=st.session_state.calibration_factors,
+                        pk_params=st.session_state.pk_params
                     )
                     st.session_state.calibration_factors[target_route] = new_k
                     st.rerun()
@@ -463,13 +466,51 @@ def render_calibration_tab(analyzer):
             route_name = utils.t("route_" + r.lower().replace("-", "_"))
             c_show[i].metric(f"{route_name} {utils.t('factor_label')}", f"x {val:.2f}")
             
+    render_pk_fit_section(analyzer)
+
     if st.button(utils.t("cal_reset_btn")):
         st.session_state.calibration_factors = {
             "Injection": 1.0, "Oral": 1.0, "Transdermal": 1.0, "Sublingual": 1.0
         }
         st.session_state.lab_history = {}
+        st.session_state.pk_params = {}
         st.rerun()
 
+def render_pk_fit_section(analyzer):
+    """검사 기록 기반 개인별 PK 파라미터(ka, ke, 농도 배율) 피팅 UI"""
+    e2_sched = [
+        d for d in st.session_state.drug_schedule
+        if d['name'] in data.DRUG_DB and data.DRUG_DB[d['name']].type in analysis.ESTROGEN_ROUTES
+    ]
+    n_labs = len(analyzer._flatten_lab_history(st.session_state.lab_history)[0])
+
+    st.markdown("---")
+    st.subheader(utils.t("pk_fit_title"))
+    st.caption(utils.t("pk_fit_caption").format(count=analysis.FIT_MIN_LABS))
+
+    if n_labs < analysis.FIT_MIN_LABS or not e2_sched:
+        st.info(utils.t("pk_fit_need_labs").format(count=analysis.FIT_MIN_LABS, current=n_labs))
+    elif st.button(utils.t("pk_fit_btn"), type="primary"):
+        result = analyzer.fit_pk_parameters(
+            e2_sched, st.session_state.lab_history, st.session_state.calibration_factors
+        )
+        st.session_state.pk_params = result["params"]
+        st.success(utils.t("pk_fit_success").format(before=result["rmse_before"], after=result["rmse_after"]))
+
+    if st.session_state.get("pk_params"):
+        for name, fitted in st.session_state.pk_params.items():
+            if name not in data.DRUG_DB:
+                continue
+            ka0, ke0 = analysis.get_ka_ke(data.DRUG_DB[name])
+            st.markdown(
+                f"- **{name}**: {utils.t('pk_fit_half_life')} ×{ke0 / fitted['ke']:.2f}, "
+                f"{utils.t('pk_fit_absorption')} ×{fitted['ka'] / ka0:.2f}, "
+                f"{utils.t('pk_fit_scale')} ×{fitted['scale']:.2f}"
+            )
+        if st.button(utils.t("pk_fit_reset_btn")):
+            st.session_state.pk_params = {}
+            st.rerun()
+
 def render_missed_dose_checker():
     """복약 잊음 계산기 UI"""
     st.markdown(f"### {utils.t('missed_title')}")
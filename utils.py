@@ -134,6 +134,15 @@ def calculate_stats(concentration_array, t_days=None):
 
     trough = min(steady_state_array) if len(steady_state_array) > 0 else peak
     avg = sum(steady_state_array) / len(steady_state_array) if len(steady_state_array) > 0 else peak
+
+    # 비균일 격자(적응형 시뮬레이션)에서는 격자점이 몰린 구간에 편향되지 않도록 시간 가중 평균 사용
+    if t_days is not None and len(t_days) == len(concentration_array) and len(steady_state_array) > 1:
+        steady_t = np.asarray(t_days[first_peak_idx:first_peak_idx + len(steady_state_array)], dtype=float)
+        steps = np.diff(steady_t)
+        span = steady_t[-1] - steady_t[0]
+        if span > 0 and np.ptp(steps) > 1e-6 * np.mean(steps):
+            steady_y = np.asarray(steady_state_array, dtype=float)
+            avg = np.sum((steady_y[1:] + steady_y[:-1]) * steps) / (2 * span)
     
     # 변동 지수 (Fluctuation Index): (Peak - Trough) / Average
     fluctuation = ((peak - trough) / avg * 100) if avg > 0 else 0
@@ -146,19 +155,91 @@ def calculate_stats(concentration_array, t_days=None):
         "max_slope": max_slope
     }
 
-def calculate_rmse(t_days, y_conc, lab_points):
+def summarize_exposure_stream(chunks, start_day=0.0):
+    """
+    청크 단위 시뮬레이션(HormoneAnalyzer.simulate_schedule_stream) 결과를 한 번만 순회하며 장기 노출 요약 계산
+    전체 곡선을 보관하지 않으므로 수년치 기록도 일정한 메모리로 처리됩니다.
+    :param chunks: (t_days, 농도) 청크 iterable
+    :param start_day: 이 날짜 이전(초기 상승 구간 등)은 요약에서 제외
+    :return: peak/trough/avg(시간 가중 평균)/max_slope(per Day)/auc(농도·일)/days
+    """
+    peak = 0.0
+    trough = None
+    auc = 0.0
+    max_slope = 0.0
+    first_t = None
+    prev_t = None
+    prev_y = None
+
+    for t_chunk, y_chunk in chunks:
+        keep = np.asarray(t_chunk) >= start_day
+        t_chunk = np.asarray(t_chunk, dtype=float)[keep]
+        y_chunk = np.asarray(y_chunk, dtype=float)[keep]
+        if len(t_chunk) == 0:
+            continue
+
+        # 이전 청크의 마지막 점을 이어 붙여 청크 경계 구간까지 적분/기울기에 포함
+        if prev_t is not None:
+            t_chunk = np.concatenate(([prev_t], t_chunk))
+            y_chunk = np.concatenate(([prev_y], y_chunk))
+        elif first_t is None:
+            first_t = t_chunk[0]
+
+        peak = max(peak, float(np.max(y_chunk)))
+        chunk_min = float(np.min(y_chunk))
+        trough = chunk_min if trough is None else min(trough, chunk_min)
+        if len(t_chunk) > 1:
+            dt = np.diff(t_chunk)
+            dy = np.diff(y_chunk)
+            auc += float(np.sum((y_chunk[1:] + y_chunk[:-1]) * dt) / 2)
+            max_slope = max(max_slope, float(np.max(np.abs(dy / dt))))
+        prev_t = t_chunk[-1]
+        prev_y = y_chunk[-1]
+
+    if first_t is None:
+        return {"peak": 0, "trough": 0, "avg": 0, "max_slope": 0, "auc": 0, "days": 0}
+
+    days = float(prev_t - first_t)
+    avg = auc / days if days > 0 else float(prev_y)
+    return {
+        "peak": peak,
+        "trough": trough,
+        "avg": avg,
+        "max_slope": max_slope,
+        "auc": auc,
+        "days": days
+    }
+
+def summarize_analytes(t_days, analytes, window_days=7.0):
+    """
+    다중 분석물 곡선(HormoneAnalyzer.simulate_analytes) 요약: 분석물별 {"avg": 최근 window_days일 평균, "last": 마지막 값}
+    """
+    t_days = np.asarray(t_days)
+    if len(t_days) == 0:
+        return {}
+    recent = t_days >= t_days[-1] - window_days
+    return {
+        name: {"avg": float(np.mean(curve[recent])), "last": float(curve[-1])}
+        for name, curve in analytes.items()
+    }
+
+def calculate_rmse(t_days, y_conc, lab_points, predictions=None):
     """
     예측 곡선(t_days, y_conc)과 실제 측정 점들(lab_points) 사이의 RMSE 계산
     :param lab_points: list of (day, value) tuples
+    :param predictions: 검사 시각별 정확한 예측값 (HormoneAnalyzer.concentration_at), 있으면 곡선의 최근접 격자값 대신 사용
     """
     if not lab_points:
         return None
     
     sq_errors = []
-    for day, val in lab_points:
-        # 시뮬레이션 시간축에서 검사일과 가장 가까운 인덱스 찾기
-        idx = (np.abs(t_days - day)).argmin()
-        prediction = y_conc[idx]
+    for i, (day, val) in enumerate(lab_points):
+        if predictions is not None:
+            prediction = predictions[i]
+        else:
+            # 시뮬레이션 시간축에서 검사일과 가장 가까운 인덱스 찾기
+            idx = (np.abs(t_days - day)).argmin()
+            prediction = y_conc[idx]
         sq_errors.append((prediction - val) ** 2)
     
     if not sq_errors:
@@ -218,9 +299,10 @@ def calculate_vte_risk_score(profile, is_smoker, history_vte, surgery_risk_level
     if score <= 6: return score, t("risk_high"), "red"
     return score, t("risk_vhigh"), "#8B0000"
 
-def get_monitoring_messages(drugs, checklist=None):
+def get_monitoring_messages(drugs, checklist=None, analyte_summary=None):
     """
     처방된 약물 및 체크리스트에 따른 필수 검사 항목을 마크다운 표 형태로 반환
+    analyte_summary(summarize_analytes 결과)가 있으면 예상 테스토스테론이 목표보다 높을 때 T 검사 항목을 추가합니다.
     """
     if checklist is None: checklist = {}
     
@@ -242,8 +324,14 @@ def get_monitoring_messages(drugs, checklist=None):
         monitoring_map["Cyproterone Acetate"] = "Liver Function (LFT), Prolactin"
     if checklist.get("has_p4"):
         monitoring_map["Progesterone"] = "Lipid Profile, BP"
+
     if checklist.get("has_gnrh"):
         monitoring_map["GnRH Agonist"] = "Bone Density (DXA), LH/FSH"
+
+    # Protocol 3 (예상 곡선)
+    t_summary = (analyte_summary or {}).get("T")
+    if t_summary is not None and t_summary["avg"] > data.GUIDELINES["WPATH_SOC8"]["t_max"]:
+        monitoring_map["Testosterone"] = t("monitor_t_predicted").format(level=t_summary["avg"])
         
     if not monitoring_map:
         return None
@@ -308,9 +396,10 @@ def check_drug_interactions(current_schedule, other_meds_list):
 
     return warnings
 
-def perform_safety_analysis(drugs, user_profile, is_smoker, history_vte, has_migraine, stats, stats_b, unit_choice, compare_mode, checklist=None, interactors=None):
+def perform_safety_analysis(drugs, user_profile, is_smoker, history_vte, has_migraine, stats, stats_b, unit_choice, compare_mode, checklist=None, interactors=None, analyte_summary=None):
     """
     종합적인 임상 안전성 분석 수행 (VTE, 간 독성, 급격한 농도 변화 등)
+    :param analyte_summary: 다중 분석물 요약(summarize_analytes), 있으면 테스토스테론 억제 여부를 예상 곡선으로 판단
     """
     if checklist is None: checklist = {}
     risk_messages = []
@@ -415,6 +504,17 @@ def perform_safety_analysis(drugs, user_profile, is_smoker, history_vte, has_mig
     has_aa = any("Anti-Androgen" in d['type'] for d in drugs)
     has_aa_check = checklist.get("has_spiro") or checklist.get("has_cpa") or checklist.get("has_gnrh")
     is_combo_therapy = has_aa or has_aa_check
+
+    # 예상 테스토스테론 곡선이 목표보다 높으면 추가 경고 (병용 요법 판단은 체크리스트 기준 유지)
+    t_summary = (analyte_summary or {}).get("T")
+    if t_summary is not None:
+        t_target = data.GUIDELINES["WPATH_SOC8"]["t_max"]
+        if t_summary["avg"] > t_target:
+            risk_messages.append({
+                "level": "MEDIUM",
+                "msg": t("risk_t_not_suppressed").format(level=t_summary["avg"], target=t_target)
+            })
+
     monotherapy_status = None
     
     if trough_pg > 200: